@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Decoding every sprite from its file against mapping them from a sprite pack, run with: python -m benchmarks.assets
+
+Both load all images and the gameplay atlas as the game does at startup, converted for a (dummy) display.
+"""
+import os
+import tempfile
+import time
+import pygame
+
+from scripts.Assets import SpritePack, SpriteAtlas, asset_path, in_display_format
+from scripts.BuildPack import build_pack, image_paths
+from scripts.Scene import sprite_paths
+
+
+def decode_all(paths: list) -> int:
+    surfaces = [pygame.image.load(asset_path(path)).convert_alpha() for path in paths]
+    atlas, rects = SpriteAtlas.pack(list(sprite_paths.values()))
+    atlas = atlas.convert_alpha()
+    return len(surfaces) + len(rects)
+
+
+def map_all(pack_path: str, paths: list) -> int:
+    pack = SpritePack(pack_path)
+    surfaces = [pack.image(path) for path in paths]
+    atlas, rects = pack.atlas(tuple(sprite_paths.values()))
+    assert in_display_format(atlas)
+    return len(surfaces) + len(rects)
+
+
+def measure(function, *args, repeats: int = 50) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(*args)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    paths = image_paths()
+    with tempfile.TemporaryDirectory() as folder:
+        pack_path = os.path.join(folder, "sprites.pack")
+        build_pack(pack_path)
+        print("pack: {} bytes".format(os.path.getsize(pack_path)))
+        decoded = measure(decode_all, paths)
+        mapped = measure(map_all, pack_path, paths)
+    print("decode images:  {:8.3f} ms".format(decoded * 1000))
+    print("map sprite pack: {:7.3f} ms".format(mapped * 1000))
+    print("speedup:        {:8.1f}x".format(decoded / mapped))
+
+
+if __name__ == "__main__":
+    main()
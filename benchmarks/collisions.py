@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+""" Compares scanning the enemy list against querying the spatial hash, run with: python -m benchmarks.collisions"""
+import random
+import time
+import pygame
+
+from scripts.Collision import SpatialHash
+
+
+class Body:
+    def __init__(self, rect: pygame.Rect):
+        self.rect = rect
+
+
+def make_world(entity_count: int, projectile_count: int, rng: random.Random):
+    # keep the density of a crowded level (~1000 ships on 800x640) by growing the world with the entity count
+    scale = max(1.0, (entity_count / 1000) ** 0.5)
+    width, height = int(800 * scale), int(640 * scale)
+    enemies = [Body(pygame.Rect(rng.randrange(width), rng.randrange(height), 50, 40)) for _ in range(entity_count)]
+    projectiles = [Body(pygame.Rect(rng.randrange(width), rng.randrange(height), 6, 14))
+                   for _ in range(projectile_count)]
+    return enemies, projectiles
+
+
+def linear_tick(enemies: list, projectiles: list) -> int:
+    hits = 0
+    for projectile in projectiles:
+        for enemy in enemies:
+            if projectile.rect.colliderect(enemy.rect):
+                hits += 1
+    return hits
+
+
+def spatial_hash_tick(grid: SpatialHash, enemies: list, projectiles: list) -> int:
+    hits = 0
+    grid.rebuild(enemies)
+    for projectile in projectiles:
+        hits += len(grid.colliding(projectile.rect))
+    return hits
+
+
+def measure(function, *args, min_time: float = 0.5):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = function(*args)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs, result
+
+
+def main():
+    rng = random.Random(0)
+    # the linear scan grows with projectiles * enemies, past this many projectiles it is timed on a sample
+    # and scaled up, its cost is exactly proportional to the projectile count
+    linear_sample = 200
+    print("{:>9} {:>8} {:>12} {:>13} {:>11} {:>9}".format(
+        "entities", "enemies", "projectiles", "linear [ms]", "grid [ms]", "speedup"))
+    for entity_count in (1000, 10000, 100000):
+        projectile_count = entity_count // 10
+        enemies, projectiles = make_world(entity_count - projectile_count, projectile_count, rng)
+
+        sample = projectiles[:linear_sample]
+        linear_time, linear_hits = measure(linear_tick, enemies, sample)
+        linear_time *= len(projectiles) / len(sample)
+        grid_time, grid_hits = measure(spatial_hash_tick, SpatialHash(), enemies, projectiles)
+        assert linear_hits == spatial_hash_tick(SpatialHash(), enemies, sample)
+
+        print("{:>9} {:>8} {:>12} {:>12.1f}{} {:>11.1f} {:>8.1f}x".format(
+            entity_count, len(enemies), projectile_count, linear_time * 1000,
+            "*" if len(sample) < len(projectiles) else " ", grid_time * 1000, linear_time / grid_time))
+    print("* estimated from {} projectiles".format(linear_sample))
+
+
+if __name__ == "__main__":
+    main()
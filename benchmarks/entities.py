@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" Per tick cost of moving and killing stress-level crowds of enemies, run with: python -m benchmarks.entities"""
+import random
+import time
+import pygame
+
+from scripts.EntityStore import EntityStore
+from scripts.GameplayObjects import GameplayObject, Enemy
+
+
+class StubPlayer:
+    def die(self):
+        pass
+
+
+class StubScene:
+    def __init__(self, game_instance):
+        self.is_active = True
+        self.game_instance = game_instance
+        self.game_objects = dict(player=StubPlayer())
+
+
+class StubGame:
+    def __init__(self):
+        self.width = 800
+        self.height = 640
+        self.current_scene = StubScene(self)
+
+
+class PlainEnemy(GameplayObject):
+    """ The per-object Enemy.update the store replaced, kept here as the baseline"""
+    def __init__(self, scene_instance, image: pygame.Surface, pos: (int, int)):
+        super().__init__(scene_instance)
+        self.image = image
+        self.rect = image.get_rect().move(pos)
+        self.speed = (2, 0)
+        self.width = self.rect.width
+        self.y_jump = 50
+
+    def update(self):
+        self.move_float(self.speed[0], self.speed[1])
+        if self.rect.x < 0 or self.rect.x + self.width > self.game_instance.width:
+            self.speed = (-self.speed[0], self.speed[1])
+            self.rect.y += self.y_jump
+        if self.rect.x < 0:
+            self.rect.x = 0
+        elif self.rect.x + self.width > self.game_instance.width:
+            self.rect.x = self.game_instance.width - self.width
+        if self.rect.y + self.rect.height > self.game_instance.height:
+            self.scene_instance.game_objects["player"].die()
+
+
+def measure(function, ticks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ticks):
+        function()
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    rng = random.Random(0)
+    game = StubGame()
+    scene = game.current_scene
+    enemy_image = pygame.Surface((40, 29))
+    ticks = 50
+
+    print("{:>9} {:>17} {:>17} {:>9}".format("entities", "per object [ms]", "vectorized [ms]", "speedup"))
+    for count in (1000, 10000, 50000):
+        positions = [(rng.randrange(700), rng.randrange(-50000, 0)) for _ in range(count)]
+
+        plain = [PlainEnemy(scene, enemy_image, position) for position in positions]
+
+        def plain_tick():
+            for enemy in plain:
+                enemy.update()
+
+        enemies = EntityStore()
+        for position in positions:
+            enemies.append(Enemy(scene, enemy_image, position))
+
+        def vectorized_tick():
+            Enemy.update_all(enemies, scene, len(enemies))
+
+        plain_time = measure(plain_tick, ticks)
+        vectorized_time = measure(vectorized_tick, ticks)
+        print("{:>9} {:>17.3f} {:>17.3f} {:>8.1f}x".format(
+            count, plain_time * 1000, vectorized_time * 1000, plain_time / vectorized_time))
+
+    # mass deaths, e.g. ghost bullets going through a full formation
+    count = 50000
+    print()
+    print("{:>9} {:>9} {:>17} {:>17}".format("entities", "deaths", "list scan [ms]", "kill queue [ms]"))
+    for deaths in (10, 100, 1000):
+        plain = [PlainEnemy(scene, enemy_image, (0, 0)) for _ in range(count)]
+        victims = rng.sample(plain, deaths)
+        start = time.perf_counter()
+        for victim in victims:
+            for i in range(len(plain)):
+                if victim == plain[i]:
+                    del plain[i]
+                    break
+        scan_time = time.perf_counter() - start
+
+        enemies = EntityStore()
+        for _ in range(count):
+            enemies.append(Enemy(scene, enemy_image, (0, 0)))
+        victims = rng.sample(enemies.objects, deaths)
+        start = time.perf_counter()
+        for victim in victims:
+            enemies.kill(victim)
+        enemies.compact()
+        queue_time = time.perf_counter() - start
+        print("{:>9} {:>9} {:>17.3f} {:>17.3f}".format(count, deaths, scan_time * 1000, queue_time * 1000))
+
+    print("frame budget at 60 fps: {:.3f} ms".format(1000 / 60))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+""" Cost of pixel accurate collision on top of rect collision, run with: python -m benchmarks.masks
+
+Queries that overlap no rect, the case of almost every query in a game, never reach the masks, so touching()
+should cost the same as colliding() there. Queries overlapping a rect pay for one mask overlap per hit.
+"""
+import random
+import time
+import pygame
+
+from scripts.Assets import asset_path
+from scripts.Collision import SpatialHash, sprite_mask
+
+
+class Body:
+    def __init__(self, image: pygame.Surface, pos: (int, int)):
+        self.image = image
+        self.mask = sprite_mask(image)
+        self.rect = image.get_rect().move(pos)
+
+
+def make_world(enemy_count: int, enemy_image: pygame.Surface, query_image: pygame.Surface) -> list:
+    # enemies on a grid with gaps a query fits in without touching them
+    width = enemy_image.get_width() + query_image.get_width() + 4
+    height = enemy_image.get_height() + query_image.get_height() + 4
+    columns = max(1, int(enemy_count ** 0.5))
+    return [Body(enemy_image, ((i % columns) * width, (i // columns) * height)) for i in range(enemy_count)]
+
+
+def make_queries(enemies: list, query_image: pygame.Surface, overlap: bool, count: int, rng: random.Random) -> list:
+    width, height = enemies[0].rect.size
+    queries = []
+    for _ in range(count):
+        enemy = rng.choice(enemies)
+        if overlap:
+            # somewhere over the enemy, on opaque pixels or not
+            pos = (enemy.rect.x + rng.randrange(width), enemy.rect.y + rng.randrange(height))
+        else:
+            # in the gap right of the enemy
+            pos = (enemy.rect.right + 2, enemy.rect.y)
+        queries.append(Body(query_image, pos))
+    return queries
+
+
+def measure(function, *args, min_time: float = 0.3):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        result = function(*args)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs, result
+
+
+def rect_tick(grid: SpatialHash, queries: list) -> int:
+    return sum(len(grid.colliding(query.rect)) for query in queries)
+
+
+def mask_tick(grid: SpatialHash, queries: list) -> int:
+    return sum(len(grid.touching(query.rect, query.mask)) for query in queries)
+
+
+def main():
+    rng = random.Random(0)
+    boss = pygame.image.load(asset_path("assets/boss_ship.png"))
+    enemy = pygame.image.load(asset_path("assets/alien_ship.png"))
+    projectile = pygame.image.load(asset_path("assets/enemy_projectile_spread.png"))
+    player = pygame.image.load(asset_path("assets/player_ship.png"))
+    query_count = 1000
+
+    print("{:<32} {:>8} {:>8} {:>11} {:>11} {:>8} {:>12}".format(
+        "case", "enemies", "queries", "rect [us]", "mask [us]", "extra", "rect/mask hits"))
+    for name, sprite, query_image, enemy_count in (
+            ("projectile vs enemies", enemy, projectile, 44),
+            ("player vs enemies", enemy, player, 44),
+            ("player vs boss", boss, player, 1),
+            ("projectile vs crowd", enemy, projectile, 10000)):
+        enemies = make_world(enemy_count, sprite, query_image)
+        grid = SpatialHash()
+        grid.rebuild(enemies)
+        for overlap in (False, True):
+            queries = make_queries(enemies, query_image, overlap, query_count, rng)
+            rect_time, rect_hits = measure(rect_tick, grid, queries)
+            mask_time, mask_hits = measure(mask_tick, grid, queries)
+            print("{:<32} {:>8} {:>8} {:>11.3f} {:>11.3f} {:>+7.0%} {:>12}".format(
+                name + (" (overlap)" if overlap else ""), enemy_count, query_count,
+                rect_time / query_count * 1e6, mask_time / query_count * 1e6, mask_time / rect_time - 1,
+                "{}/{}".format(rect_hits, mask_hits)))
+
+    # what the cache saves, a mask made from the surface for every check instead
+    start = time.perf_counter()
+    for _ in range(1000):
+        pygame.mask.from_surface(boss)
+    uncached = (time.perf_counter() - start) / 1000
+    start = time.perf_counter()
+    for _ in range(1000):
+        sprite_mask(boss)
+    cached = (time.perf_counter() - start) / 1000
+    print()
+    print("boss mask from surface {:.3f} us, from cache {:.3f} us".format(uncached * 1e6, cached * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+""" Memory of many games played one after another in one process, run with: python -m benchmarks.memory
+
+Games are played the way a batch worker plays them, then environments are made and dropped without being closed,
+like a training script could. Neither may keep memory or the frozen generation growing, the process exits with 1
+if they do.
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import pygame
+
+from scripts.Batch import play
+from scripts.Environment import GameEnv
+
+
+def rss_mib() -> float:
+    """ Resident memory of the process, the peak of it where /proc is not there"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def play_env(seed: int, steps: int):
+    env = GameEnv(seed=seed)
+    env.reset(seed)
+    for i in range(steps):
+        observation, reward, terminated, truncated, info = env.step(i % env.action_count)
+        if terminated:
+            env.reset()
+    # dropped without close()
+
+
+def measure(name: str, play_one, count: int, warmup: int, max_growth: float) -> bool:
+    """ Play count games, True if memory or the frozen generation grew after the first warmup of them"""
+    memory = []
+    frozen = []
+    for i in range(count):
+        play_one(i)
+        memory.append(rss_mib())
+        frozen.append(gc.get_freeze_count())
+    growth = memory[-1] - memory[warmup - 1]
+    frozen_growth = frozen[-1] - frozen[warmup - 1]
+    grew = growth > max_growth or frozen_growth > 0
+    print("{:<8} {:>6} {:>12.1f} {:>12.1f} {:>11.1f} {:>13} {:>11} {:>7}".format(
+        name, count, memory[warmup - 1], memory[-1], growth, frozen[warmup - 1], frozen[-1],
+        "GREW" if grew else "ok"))
+    return grew
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Space Invaders memory over many games")
+    parser.add_argument("--games", type=int, default=50, help="games played of every kind")
+    parser.add_argument("--warmup", type=int, default=5, help="games played before memory is expected to stay")
+    parser.add_argument("--ticks", type=int, default=3000, help="ticks per game at most")
+    parser.add_argument("--max-growth", type=float, default=8.0,
+                        help="MiB memory may grow by after the warmup games (default 8)")
+    args = parser.parse_args()
+    if not 0 < args.warmup < args.games:
+        parser.error("--warmup has to be between 0 and --games")
+
+    pygame.font.init()
+    print("{:<8} {:>6} {:>12} {:>12} {:>11} {:>13} {:>11} {:>7}".format(
+        "kind", "games", "warmup [MiB]", "end [MiB]", "grew [MiB]", "frozen warmup", "frozen end", ""))
+    grew = measure("batch", lambda i: play((i, "random", args.ticks)), args.games, args.warmup, args.max_growth)
+    grew = measure("env", lambda i: play_env(i, args.ticks), args.games, args.warmup, args.max_growth) or grew
+    if grew:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
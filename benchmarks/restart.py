@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+""" Time from "play again" to a playable game, run with: python -m benchmarks.restart
+
+A cold start loads the gameplay scene of a new game with empty asset caches, a restart is what pressing 'r' on
+the end screen does after a game was played, with the end screen shown for a second first. Both run with a
+(dummy) display, so sprites are converted like in the real game. Collections the garbage collector leaves for
+the end of a frame are run where the frame would end and timed with the restart.
+"""
+import os
+import time
+import pygame
+
+from scripts.Assets import cache
+from scripts.Game import Game
+from scripts.GarbageCollector import gc_policy
+from scripts.Headless import Autopilot
+
+
+def new_game() -> Game:
+    game = Game(seed=0, fps=0)
+    autopilot = Autopilot()
+    autopilot.game_instance = game
+    game.input = autopilot
+    return game
+
+
+def cold_start() -> float:
+    cache.clear()
+    game = new_game()
+    start = time.perf_counter()
+    game.load_scene("gameplay")
+    return time.perf_counter() - start
+
+
+def restart(game: Game, ticks: int) -> float:
+    """ Play ticks ticks (or until the game ends), then restart from the end screen"""
+    for _ in range(ticks):
+        if game.current_scene_name != "gameplay":
+            break
+        game.step()
+        gc_policy.end_of_frame()
+    if game.current_scene_name == "gameplay":
+        game.end_score = game.current_scene.score
+        game.load_scene("endscreen")
+    for _ in range(60):
+        game.step()
+        gc_policy.end_of_frame()
+    start = time.perf_counter()
+    game.restart()
+    gc_policy.end_of_frame()
+    return time.perf_counter() - start
+
+
+def main():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    colds = [cold_start() for _ in range(10)]
+
+    game = new_game()
+    game.load_scene("gameplay")
+    restarts = [restart(game, 600) for _ in range(10)]
+
+    print("cold start: {:7.3f} ms (best of {})".format(min(colds) * 1000, len(colds)))
+    print("restart:    {:7.3f} ms (best of {}), {:.3f} ms worst".format(
+        min(restarts) * 1000, len(restarts), max(restarts) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+""" Per tick cost of the main menu starfield at growing densities, run with: python -m benchmarks.starfield"""
+import random
+import time
+import pygame
+
+from scripts.Starfield import Starfield
+
+
+class StubGame:
+    def __init__(self):
+        self.width = 800
+        self.height = 640
+        self.screen = pygame.Surface((self.width, self.height))
+        self.random = random.Random(0)
+
+
+class PlainParticle:
+    """ The per-object particle the starfield replaced, kept here as the baseline"""
+    def __init__(self, game_instance, particles: list, pos: (int, int), speed: float):
+        self.game_instance = game_instance
+        self.particles = particles
+        self.position = pos
+        self.speed = speed
+        self.particles.append(self)
+
+    def update(self):
+        self.position = (self.position[0], self.position[1] + self.speed)
+
+    def draw(self, alpha: float = 1):
+        y = self.position[1] - self.speed * (1 - alpha)
+        self.game_instance.screen.fill((255, 255, 255), pygame.Rect(self.position[0], y, 1, 1))
+
+
+def measure(function, ticks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(ticks):
+        function()
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    game = StubGame()
+    rng = random.Random(0)
+
+    print("{:>9} {:>9} {:>17} {:>17} {:>9}".format("density", "stars", "per object [ms]", "vectorized [ms]", "speedup"))
+    for density in (1, 10, 100, 1334, 10000):
+        starfield = Starfield(game, density)
+        # the starting stars are as many as stay on screen once spawning and falling off even out
+        for _ in range(60):
+            starfield.update()
+        stars = len(starfield)
+
+        def vectorized_tick():
+            starfield.update()
+            starfield.draw(0.5)
+
+        ticks = max(10, min(300, 3000000 // stars))
+        vectorized_time = measure(vectorized_tick, ticks)
+
+        if stars <= 200000:
+            particles = []
+            for _ in range(stars):
+                PlainParticle(game, particles, (rng.randint(0, game.width), rng.randint(0, game.height)),
+                              rng.random() * 2 + 1)
+
+            def plain_tick():
+                for particle in particles:
+                    particle.update()
+                for particle in particles:
+                    particle.draw(0.5)
+
+            plain_time = measure(plain_tick, max(5, ticks // 10))
+            print("{:>9} {:>9} {:>17.3f} {:>17.3f} {:>8.1f}x".format(
+                density, stars, plain_time * 1000, vectorized_time * 1000, plain_time / vectorized_time))
+        else:
+            print("{:>9} {:>9} {:>17} {:>17.3f} {:>9}".format(density, stars, "-", vectorized_time * 1000, "-"))
+
+    print("frame budget at 60 fps: {:.3f} ms".format(1000 / 60))
+
+
+if __name__ == "__main__":
+    main()
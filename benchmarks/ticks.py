@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+""" Tick times of every level and of crowded synthetic ones, run with: python -m benchmarks.ticks
+
+Every workload is played by the autopilot for a fixed number of ticks, once only updating and once updating
+and drawing. Results can be saved as JSON and compared against a saved baseline:
+
+    python -m benchmarks.ticks --output baseline.json
+    python -m benchmarks.ticks --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import pygame
+
+from scripts.Levels import Level, Level1, Level2, Level3, Level4, Level5
+from scripts.GameplayObjects import Enemy
+
+
+class CrowdLevel(Level):
+    """ Level1 formation repeated upwards until it has multiplier times as many enemies"""
+    multiplier = 1
+
+    def load(self, scene_instance, images: dict) -> dict:
+        super().load(scene_instance, images)
+
+        for r in range(2 * self.multiplier):
+            for i in range(100, 701, 60):
+                enemy = Enemy(scene_instance, images["enemy"], (i, 100 - r * 40), score_value=int(self.kill_score))
+                if r % 2 == 0:
+                    enemy.set_speed((-2, 0))
+                self.game_objects["enemies"].append(enemy)
+
+        return self.game_objects
+
+
+def crowd(multiplier: int) -> type:
+    return type("Crowd{}x".format(multiplier), (CrowdLevel,), dict(multiplier=multiplier))
+
+
+# name: (level class, level number shown by the scene)
+workloads = {
+    "level1": (Level1, 1),
+    "level2": (Level2, 2),
+    "level3": (Level3, 3),
+    "level4": (Level4, 4),
+    "level5": (Level5, 5),
+    "crowd10x": (crowd(10), 1),
+    "crowd100x": (crowd(100), 1),
+    "crowd1000x": (crowd(1000), 1),
+}
+
+
+def start_workload(name: str, draw: bool, seed: int):
+    from scripts.Game import Game
+    from scripts.Headless import Autopilot
+
+    autopilot = Autopilot()
+    game = Game(input_source=autopilot, seed=seed)
+    autopilot.game_instance = game
+    game.draw_enabled = draw
+    game.load_scene("gameplay")
+
+    scene = game.current_scene
+    level_class, level_number = workloads[name]
+    scene.clear_level()
+    scene.game_objects = level_class().load(scene, scene.images)
+    scene.current_level = level_number
+    # the workload stays the same level even if the autopilot clears it
+    scene.check_for_end = lambda: None
+    # and never switches, building the next one would only add noise
+    scene.level_builder = None
+    return game
+
+
+def run_tick(game, draw: bool):
+    game.handle_events()
+    game.step()
+    if draw:
+        game.render()
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(name: str, draw: bool, ticks: int, seed: int, alloc_ticks: int, warmup: int) -> dict:
+    game = start_workload(name, draw, seed)
+    enemies = len(game.current_scene.game_objects["enemies"])
+    # first ticks fill caches and pools, they are not what a level costs while it is played
+    for _ in range(warmup):
+        run_tick(game, draw)
+    times = []
+    for _ in range(ticks):
+        if game.current_scene_name != "gameplay":
+            break
+        start = time.perf_counter()
+        run_tick(game, draw)
+        elapsed = (time.perf_counter() - start) * 1000
+        # the tick the game ended in also unloaded the scene, it is not a gameplay tick
+        if game.current_scene_name == "gameplay":
+            times.append(elapsed)
+    ordered = sorted(times)
+
+    # allocations are measured on a second, shorter run, tracing makes every tick a lot slower
+    game = start_workload(name, draw, seed)
+    for _ in range(warmup):
+        run_tick(game, draw)
+    tracemalloc.start()
+    allocated = 0
+    blocks = 0
+    traced_ticks = 0
+    for _ in range(min(alloc_ticks, len(times))):
+        if game.current_scene_name != "gameplay":
+            break
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        run_tick(game, draw)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+        blocks += sys.getallocatedblocks() - blocks_before
+        traced_ticks += 1
+    tracemalloc.stop()
+
+    return dict(
+        workload=name,
+        draw=draw,
+        ticks=len(times),
+        enemies=enemies,
+        mean_ms=sum(times) / len(times),
+        p50_ms=percentile(ordered, 0.5),
+        p99_ms=percentile(ordered, 0.99),
+        max_ms=ordered[-1],
+        # peak memory taken during a tick above what was in use before it
+        alloc_kib_per_tick=allocated / 1024 / max(traced_ticks, 1),
+        # memory blocks still allocated after a tick, should stay near 0
+        net_blocks_per_tick=blocks / max(traced_ticks, 1),
+    )
+
+
+def key(result: dict) -> str:
+    return "{}/{}".format(result["workload"], "draw" if result["draw"] else "update")
+
+
+def print_results(results: list):
+    print("{:<18} {:>6} {:>9} {:>9} {:>9} {:>9} {:>12} {:>11}".format(
+        "workload", "ticks", "mean [ms]", "p50 [ms]", "p99 [ms]", "max [ms]", "alloc [KiB]", "net blocks"))
+    for result in results:
+        print("{:<18} {:>6} {:>9.3f} {:>9.3f} {:>9.3f} {:>9.3f} {:>12.1f} {:>11.1f}".format(
+            key(result), result["ticks"], result["mean_ms"], result["p50_ms"], result["p99_ms"], result["max_ms"],
+            result["alloc_kib_per_tick"], result["net_blocks_per_tick"]))
+
+
+def compare(results: list, baseline: list, threshold: float) -> bool:
+    """ Print how results changed against the baseline, True if any mean got slower than threshold
+
+    p99 is printed too but does not count as a regression, it moves a lot between runs of short ticks.
+    """
+    baseline = {key(result): result for result in baseline}
+    regressed = False
+    print()
+    print("{:<18} {:>14} {:>14} {:>9}".format("workload", "mean change", "p99 change", ""))
+    for result in results:
+        old = baseline.get(key(result))
+        if old is None:
+            print("{:<18} {:>14} {:>14}".format(key(result), "new", "new"))
+            continue
+        mean_change = result["mean_ms"] / old["mean_ms"] - 1
+        p99_change = result["p99_ms"] / old["p99_ms"] - 1
+        slower = mean_change > threshold
+        regressed = regressed or slower
+        print("{:<18} {:>+13.1%} {:>+13.1%} {:>9}".format(
+            key(result), mean_change, p99_change, "SLOWER" if slower else ""))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Space Invaders tick benchmarks")
+    parser.add_argument("--ticks", type=int, default=300, help="timed ticks per workload")
+    parser.add_argument("--warmup", type=int, default=30, help="untimed ticks before measuring")
+    parser.add_argument("--alloc-ticks", type=int, default=50, help="ticks traced for allocations per workload")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workloads", nargs="+", choices=list(workloads), default=list(workloads))
+    parser.add_argument("--no-draw", action="store_true", help="only measure ticks without drawing")
+    parser.add_argument("--output", metavar="PATH", help="save results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown of the mean tick reported as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    # drawing goes to an invisible display so surfaces are converted like in the real game
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+
+    results = []
+    for name in args.workloads:
+        for draw in (False,) if args.no_draw else (False, True):
+            results.append(measure(name, draw, args.ticks, args.seed, args.alloc_ticks, args.warmup))
+    print_results(results)
+    print("frame budget at 60 fps: {:.3f} ms".format(1000 / 60))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(dict(ticks=args.ticks, warmup=args.warmup, alloc_ticks=args.alloc_ticks, seed=args.seed,
+                           results=results), file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 #!/bin/bash
-#You must have pyinstaller (duh) and pygame to build the project
-pyinstaller main.py -F --add-data assets:assets -n Space\ Invaders
+#You must have pyinstaller (duh), pygame and numpy to build the project
+#sprites are decoded ahead of time into one pack the game maps into memory, build/ is pyinstaller's work folder anyway
+python -m scripts.BuildPack build/sprites.pack || exit 1
+#pkg_resources is left out, pygame only imports it if present and it makes up half of pygame's import time
+pyinstaller main.py -F --add-data assets:assets --add-data build/sprites.pack:assets --exclude-module pkg_resources \
+    -n Space\ Invaders
@@ -1,12 +1,134 @@
 #!/usr/bin/env python3
+import time
+
+# taken before anything else is imported, for --startup-profile
+started = time.perf_counter()
+
+import argparse
+import multiprocessing
 import pygame
-from scripts.Game import Game
 
-pygame.init()
 
-game = Game()
-game.load_scene("menu")
-while game.is_running:
-    game.run()
+def main():
+    from scripts.Headless import policies
+
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate one game without a window as fast as possible and report ticks per second")
+    parser.add_argument("--ticks", type=int, default=100000, help="tick limit for --headless and --batch runs")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="erase and update only the areas drawn on instead of the whole window every frame")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="rendered frames per second at most (0 for no limit), the game itself always runs at "
+                             "60 ticks")
+    parser.add_argument("--frame-budget", action="store_true",
+                        help="skip drawing frames instead of falling behind when the machine is too slow")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed, the same seed and input play the same game (first seed of a --batch)")
+    parser.add_argument("--record", metavar="PATH", help="record every game played to a replay file")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="profile every frame and export the timings as CSV (or JSON if PATH ends with .json)")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play the games of a replay file again without a window and check they went the same "
+                             "way")
+    parser.add_argument("--batch", type=int, metavar="GAMES",
+                        help="play this many headless games, one seed each, spread over all CPU cores")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch (default: all cores)")
+    parser.add_argument("--policy", choices=policies, default="autopilot",
+                        help="who plays --headless and --batch games")
+    parser.add_argument("--results", metavar="PATH", help="save the --batch results table as CSV")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long each part of starting up took until the first menu frame")
+    parser.add_argument("--gc", choices=("managed", "unmanaged"), default="managed",
+                        help="run the garbage collector only at scene changes and level switches, or whenever "
+                             "Python wants to")
+    parser.add_argument("--gc-log", metavar="PATH", help="save every garbage collection pause as CSV")
+    args = parser.parse_args()
+
+    from scripts.Startup import StartupProfile
+    from scripts.GarbageCollector import gc_policy
+
+    gc_policy.managed = args.gc == "managed"
+
+    startup = StartupProfile(started)
+    startup.mark("imports")
+
+    recorder = None
+    if args.record:
+        from scripts.Replay import InputRecorder
+
+        recorder = InputRecorder(None)
+
+    if args.batch:
+        from scripts.Batch import run_batch, print_batch, save_batch
+
+        first_seed = args.seed if args.seed is not None else 0
+        batch = run_batch(range(first_seed, first_seed + args.batch), args.policy, args.ticks, args.workers)
+        print_batch(batch)
+        if args.results:
+            save_batch(args.results, batch)
+    elif args.replay:
+        from scripts.Replay import load_recordings, replay
+
+        pygame.font.init()
+        for recording in load_recordings(args.replay):
+            report = replay(recording)
+            print("seed {}: {} ticks, score {}, {:.0f} ticks per second".format(
+                recording.seed, report["ticks"], report["score"], report["ticks_per_second"]))
+    elif args.headless:
+        from scripts.Headless import run_headless, print_report
+
+        # only fonts are needed, no display is ever opened
+        pygame.font.init()
+        print_report(run_headless(args.ticks, args.seed, recorder, args.profile, args.policy))
+    else:
+        from scripts.Game import Game
+        from scripts.Fonts import fonts
+
+        startup.mark("import game")
+        # the window and text are all the game uses, sound and joysticks are never brought up
+        pygame.display.init()
+        pygame.font.init()
+        startup.mark("pygame init")
+
+        game = Game(dirty_rects=args.dirty_rects, fps=args.fps, frame_budget=args.frame_budget, seed=args.seed)
+        if recorder is not None:
+            recorder.source = game.input
+            recorder.game_instance = game
+            game.input = recorder
+            game.recorder = recorder
+        if args.profile:
+            game.profiler.start()
+        startup.mark("game setup")
+        game.load_scene("menu")
+        startup.mark("menu load")
+        # every font any scene uses, opened before the first frame so none of them is looked up during play
+        fonts.warm_up()
+        startup.mark("fonts")
+        game.run()
+        startup.mark("first frame")
+        if args.startup_profile:
+            startup.report()
+        while game.is_running:
+            game.run()
+        if args.profile:
+            game.profiler.export(args.profile)
+        if recorder is not None:
+            recorder.finish()
+        if args.gc_log:
+            print("gc: " + ", ".join("{} {}".format(key, value) for key, value in gc_policy.summary().items()))
+
+    if args.gc_log:
+        gc_policy.export(args.gc_log)
+    if recorder is not None:
+        from scripts.Replay import save_recordings
+
+        save_recordings(args.record, recorder.recordings)
+
+    pygame.quit()
+
 
-pygame.quit()
+if __name__ == "__main__":
+    # batch workers of the packaged executable start it again, this sends them to their task instead
+    multiprocessing.freeze_support()
+    main()
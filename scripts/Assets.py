@@ -0,0 +1,248 @@
+import functools
+import json
+import mmap
+import os
+import sys
+import threading
+import pygame
+
+from collections import OrderedDict
+
+# raw sprite pixels made by scripts/BuildPack.py, only packaged builds have one
+pack_path = "assets/sprites.pack"
+pack_version = 1
+# byte order of the packed pixels, the layout convert_alpha() gives on practically every display
+pack_format = "BGRA"
+
+
+def asset_path(relative_path: str) -> str:
+    """ Absolute path of an asset, works for development and for packaged one-file executable"""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+def cache_path(file_name: str) -> str:
+    """ Path of a file in the user's cache directory, for data derived from assets that is slow to make again"""
+    base_path = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_path, "space-invaders", file_name)
+
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetCache:
+    """ Decoded surfaces shared by the whole process
+
+    Once cached pixels take more than max_bytes the least recently used entries are evicted. Cached surfaces
+    are shared between everyone who loads them, copy one before drawing on it. The preloader thread uses the
+    cache too, the lock is never held while loading.
+    """
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, load, measure=surface_bytes):
+        """ Cached value for key, calling load() to create it on a miss and measure(value) for its size"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # two threads missing the same key both load it, the one putting it last wins
+        value = load()
+        self.put(key, value, measure(value))
+        return value
+
+    def put(self, key, value, size: int):
+        with self.lock:
+            self.evict(key)
+            self.entries[key] = (value, size)
+            self.bytes += size
+            # never evict the entry that was just added, even if it alone is over budget
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                self.evict(next(iter(self.entries)))
+
+    def evict(self, key) -> bool:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return False
+            self.bytes -= entry[1]
+            self.evictions += 1
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        return dict(
+            entries=len(self.entries),
+            bytes=self.bytes,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+
+cache = AssetCache()
+
+
+def display_ready() -> bool:
+    # pixel format conversion needs a display mode, headless games keep decoded surfaces as they are
+    return pygame.display.get_surface() is not None
+
+
+def in_display_format(surface: pygame.Surface) -> bool:
+    """ Whether surface already has the pixel format convert_alpha() would give it"""
+    probe = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+    return (surface.get_bitsize() == probe.get_bitsize() and surface.get_masks() == probe.get_masks() and
+            surface.get_flags() & pygame.SRCALPHA != 0)
+
+
+class SpritePack:
+    """ Pre-decoded sprites of a pack file, mapped into memory
+
+    Surfaces are made straight on top of the mapped pages, nothing is decoded or copied until a surface is drawn on.
+    The mapping is copy on write, so drawing on a sprite never changes the file.
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            header_line = file.readline()
+            header = json.loads(header_line)
+            if header.get("version") != pack_version or header.get("format") != pack_format:
+                raise ValueError("{} is not a version {} {} sprite pack".format(path, pack_version, pack_format))
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.pixels = memoryview(self.map)[len(header_line):]
+        self.images = header["images"]
+        self.atlases = {tuple(atlas["paths"]): atlas for atlas in header["atlases"]}
+
+    def __contains__(self, relative_path: str) -> bool:
+        return relative_path in self.images
+
+    def surface(self, entry: dict) -> pygame.Surface:
+        width, height = entry["size"]
+        start = entry["offset"]
+        return pygame.image.frombuffer(self.pixels[start:start + width * height * 4], (width, height), pack_format)
+
+    def image(self, relative_path: str) -> pygame.Surface:
+        return self.surface(self.images[relative_path])
+
+    def atlas(self, relative_paths: tuple) -> (pygame.Surface, dict):
+        """ Atlas surface and sprite rects by path, None if no atlas of exactly these sprites was packed"""
+        atlas = self.atlases.get(tuple(relative_paths))
+        if atlas is None:
+            return None
+        return self.surface(atlas), {path: pygame.Rect(rect) for path, rect in atlas["rects"].items()}
+
+
+@functools.lru_cache(maxsize=None)
+def sprite_pack() -> SpritePack:
+    """ The sprite pack shipped with a packaged build, None when running from the source tree"""
+    path = asset_path(pack_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        return SpritePack(path)
+    except (OSError, ValueError, KeyError) as error:
+        # the images are still there to decode
+        print("Ignoring sprite pack: {}".format(error))
+        return None
+
+
+def decode_image(relative_path: str) -> pygame.Surface:
+    """ Pixels of an image, from the sprite pack if there is one that has it, decoded from the file if not"""
+    pack = sprite_pack()
+    if pack is not None and relative_path in pack:
+        return pack.image(relative_path)
+    return pygame.image.load(asset_path(relative_path))
+
+
+def load_asset(relative_path: str, no_alpha: bool = False, decoded: pygame.Surface = None) -> pygame.Surface:
+    """ Get an asset, works for development and for packaged one-file executable, decoded once per process
+
+    decoded is what decode_image() gave for it on another thread, only the conversion is left to do then.
+    """
+    converted = display_ready()
+
+    def load():
+        surface = decoded if decoded is not None else decode_image(relative_path)
+        if not converted:
+            return surface
+        if no_alpha:
+            return surface.convert()
+        # packed sprites already are what convert_alpha() would copy them into
+        return surface if in_display_format(surface) else surface.convert_alpha()
+
+    return cache.get(("image", relative_path, no_alpha, converted), load)
+
+
+class SpriteAtlas:
+    """ Sprites packed into one converted surface, every sprite is a subsurface sharing the atlas pixels
+
+    Made from what decode() returns, which does not need the display and may run on another thread.
+    """
+    def __init__(self, surface: pygame.Surface, rects: dict):
+        if display_ready() and not in_display_format(surface):
+            surface = surface.convert_alpha()
+        self.surface = surface
+        self.sprites = {path: surface.subsurface(rect) for path, rect in rects.items()}
+
+    @classmethod
+    def decode(cls, relative_paths: list, max_width: int = 512, padding: int = 1) -> (pygame.Surface, dict):
+        """ Atlas surface and the rect of every sprite by path, from the sprite pack or packed right now"""
+        pack = sprite_pack()
+        packed = pack.atlas(relative_paths) if pack is not None else None
+        if packed is not None:
+            return packed
+        return cls.pack(relative_paths, max_width, padding)
+
+    @staticmethod
+    def pack(relative_paths: list, max_width: int = 512, padding: int = 1) -> (pygame.Surface, dict):
+        """ Blit the images into one surface, returns it and the rect of every image by path"""
+        images = {path: decode_image(path) for path in relative_paths}
+
+        # shelf packing, tallest sprites first
+        positions = dict()
+        x, y, shelf_height, width = 0, 0, 0, 0
+        for path in sorted(images, key=lambda p: images[p].get_height(), reverse=True):
+            image_width, image_height = images[path].get_size()
+            if x > 0 and x + image_width > max_width:
+                x, y, shelf_height = 0, y + shelf_height + padding, 0
+            positions[path] = (x, y)
+            x += image_width + padding
+            shelf_height = max(shelf_height, image_height)
+            width = max(width, x)
+
+        surface = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        for path, image in images.items():
+            # max blending onto the transparent atlas copies pixels as they are, alpha included
+            surface.blit(image, positions[path], special_flags=pygame.BLEND_RGBA_MAX)
+        return surface, {path: pygame.Rect(positions[path], images[path].get_size()) for path in relative_paths}
+
+    def __getitem__(self, relative_path: str) -> pygame.Surface:
+        return self.sprites[relative_path]
+
+
+def load_atlas(relative_paths: list, decoded: (pygame.Surface, dict) = None) -> SpriteAtlas:
+    """ Atlas of the given sprites, packed once per process, decoded is what SpriteAtlas.decode() gave for them"""
+    paths = tuple(relative_paths)
+    return cache.get(("atlas", paths, display_ready()),
+                     lambda: SpriteAtlas(*(decoded if decoded is not None else SpriteAtlas.decode(paths))),
+                     lambda atlas: surface_bytes(atlas.surface))
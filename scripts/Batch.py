@@ -0,0 +1,82 @@
+import csv
+import os
+import time
+import pygame
+
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.Headless import run_headless
+
+# columns of the results table
+columns = ("seed", "score", "level", "ticks", "cause")
+
+
+def init_worker():
+    # games only need fonts, workers never touch pygame.display
+    pygame.font.init()
+
+
+def play(task: (int, str, int)) -> dict:
+    """ Play one headless game, task is (seed, policy, max_ticks)"""
+    seed, policy, max_ticks = task
+    report = run_headless(max_ticks, seed, policy=policy)
+    return dict(seed=seed, score=report["score"], level=report["level"], ticks=report["ticks"],
+                cause=report["cause"], seconds=report["seconds"])
+
+
+def run_batch(seeds, policy: str = "autopilot", max_ticks: int = 100000, workers: int = None) -> dict:
+    """ Play one headless game per seed spread over a pool of worker processes
+
+    Results come back in the order of seeds. The same seed and policy always play the same game, so any row
+    can be played again with main.py --headless --seed.
+    """
+    tasks = [(seed, policy, max_ticks) for seed in seeds]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        init_worker()
+        results = [play(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_worker) as executor:
+            # games take long enough that handing them out one at a time keeps every worker busy to the end
+            results = list(executor.map(play, tasks))
+    elapsed = time.perf_counter() - start
+
+    return dict(
+        policy=policy,
+        workers=workers,
+        seconds=elapsed,
+        # time the games took added up, divided by the wall time it is how many workers were busy on average
+        game_seconds=sum(result["seconds"] for result in results),
+        results=results,
+    )
+
+
+def print_batch(batch: dict):
+    results = batch["results"]
+    print("{:>12} {:>9} {:>6} {:>7}  {}".format(*columns))
+    for result in results:
+        print("{:>12} {:>9} {:>6} {:>7}  {}".format(*(result[column] for column in columns)))
+    if not results:
+        return
+
+    print()
+    print("games:             {} with {} policy".format(len(results), batch["policy"]))
+    print("mean score:        {:.0f}".format(sum(result["score"] for result in results) / len(results)))
+    print("mean ticks:        {:.0f}".format(sum(result["ticks"] for result in results) / len(results)))
+    for level in sorted(set(result["level"] for result in results)):
+        print("reached level {}:   {}".format(level, sum(result["level"] == level for result in results)))
+    causes = dict()
+    for result in results:
+        causes[result["cause"]] = causes.get(result["cause"], 0) + 1
+    for cause, count in sorted(causes.items(), key=lambda item: -item[1]):
+        print("{:<19}{}".format(cause + ":", count))
+    print("time:              {:.3f} s on {} workers, {:.1f} games per second, parallelism {:.2f}".format(
+        batch["seconds"], batch["workers"], len(results) / batch["seconds"], batch["game_seconds"] / batch["seconds"]))
+
+
+def save_batch(path: str, batch: dict):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(batch["results"])
@@ -0,0 +1,77 @@
+""" Build step packing every image in assets into one file of raw pixels, run by build.sh with:
+
+    python -m scripts.BuildPack build/sprites.pack
+
+The file starts with one line of JSON naming every image with its offset, size and whether it has per pixel alpha,
+followed by the pixels of all of them as 32 bit BGRA rows. The gameplay sprite atlas is packed as well, with the rect
+of every sprite in it. The packaged game maps the file into memory instead of decoding images, see
+scripts.Assets.SpritePack.
+"""
+
+import json
+import os
+import sys
+import pygame
+
+from scripts.Assets import asset_path, pack_version, pack_format, SpriteAtlas
+from scripts.Scene import sprite_paths
+
+# pixel data starts at a multiple of this, so every row is aligned as well
+alignment = 64
+
+
+def image_paths() -> list:
+    """ Every image in assets, by the relative paths the game loads them with"""
+    names = os.listdir(asset_path("assets"))
+    return sorted("assets/" + name for name in names if name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")))
+
+
+def build_pack(path: str, relative_paths: list = None, atlases: list = None) -> dict:
+    """ Write a sprite pack of the images and atlases (lists of image paths), returns its header"""
+    relative_paths = image_paths() if relative_paths is None else relative_paths
+    atlases = [list(sprite_paths.values())] if atlases is None else atlases
+    chunks = []
+    offset = 0
+
+    def add(surface: pygame.Surface) -> dict:
+        nonlocal offset
+        pixels = pygame.image.tobytes(surface, pack_format)
+        entry = dict(offset=offset, size=list(surface.get_size()))
+        chunks.append(pixels)
+        offset += len(pixels)
+        return entry
+
+    images = dict()
+    for relative_path in relative_paths:
+        image = pygame.image.load(asset_path(relative_path))
+        images[relative_path] = add(image)
+        images[relative_path]["alpha"] = image.get_flags() & pygame.SRCALPHA != 0
+
+    packed_atlases = []
+    for atlas_paths in atlases:
+        surface, rects = SpriteAtlas.pack(atlas_paths)
+        entry = add(surface)
+        entry["paths"] = list(atlas_paths)
+        entry["rects"] = {atlas_path: list(rect) for atlas_path, rect in rects.items()}
+        packed_atlases.append(entry)
+
+    header = dict(version=pack_version, format=pack_format, images=images, atlases=packed_atlases)
+    header_line = json.dumps(header).encode()
+    # spaces are still valid JSON
+    header_line += b" " * (-(len(header_line) + 1) % alignment) + b"\n"
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header_line)
+        for pixels in chunks:
+            file.write(pixels)
+    os.replace(temporary_path, path)
+    return header
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else os.path.join("build", "sprites.pack")
+    header = build_pack(output)
+    print("{}: {} images, {} atlases, {} bytes".format(
+        output, len(header["images"]), len(header["atlases"]), os.path.getsize(output)))
@@ -0,0 +1,160 @@
+import weakref
+import numpy as np
+import pygame
+
+# one mask per sprite surface, dropped together with the surface
+masks = weakref.WeakKeyDictionary()
+
+
+def sprite_mask(image: pygame.Surface) -> pygame.mask.Mask:
+    """ Opaque pixels of a sprite, computed once per surface"""
+    mask = masks.get(image)
+    if mask is None:
+        mask = masks[image] = pygame.mask.from_surface(image)
+    return mask
+
+
+class SpatialHash:
+    """ Uniform grid broadphase, buckets game objects by every cell their rect overlaps
+
+    Bounds are kept as NumPy arrays and the grid is built from them in a few array operations: every (object,
+    cell) pair gets a key, the pairs are sorted by it and each cell is a run of the sorted object indices.
+    """
+    def __init__(self, cell_size: int = 64, linear_limit: int = 64, profiler=None):
+        self.cell_size = cell_size
+        # queries are timed as the "collision" phase while the profiler is enabled
+        self.profiler = profiler
+        # below this many objects a plain scan is cheaper than building the grid
+        self.linear_limit = linear_limit
+        self.objects = []
+        # left, top, right and bottom edge of every object, one row per object
+        self.bounds = np.zeros((0, 4), np.int64)
+        self.rects = None
+        self.removed = set()
+        # sorted cell keys, where each cell's run starts in cell_objects and the object indices of all runs
+        self.cells = None
+
+    def __len__(self):
+        return len(self.objects) - len(self.removed)
+
+    def rebuild(self, game_objects, position=None, size=None):
+        """ Take new objects, position and size are arrays with a row per object, read from their rects if missing
+
+        Bounds are read once here, objects must not move until the next rebuild.
+        """
+        self.objects = list(game_objects)
+        if position is None:
+            rects = [tuple(game_object.rect) for game_object in self.objects]
+            bounds = np.array(rects, np.int64).reshape(-1, 4)
+            bounds[:, 2:] += bounds[:, :2]
+        else:
+            bounds = np.empty((len(self.objects), 4), np.int64)
+            bounds[:, :2] = position
+            bounds[:, 2:] = position
+            bounds[:, 2:] += size
+        self.bounds = bounds
+        self.rects = None
+        self.removed = set()
+        # the grid itself is only built once it is queried
+        self.cells = None
+
+    def remove(self, game_object):
+        self.removed.add(game_object)
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return left // size, top // size, (right - 1) // size, (bottom - 1) // size
+
+    def build(self):
+        left, top, right, bottom = self.bounds.T
+        x0, y0, x1, y1 = self.cell_range(left, top, right, bottom)
+        columns = x1 - x0 + 1
+        # objects without an area never collide, like with pygame.Rect.colliderect they are left out
+        counts = np.where((right > left) & (bottom > top), columns * (y1 - y0 + 1), 0)
+        # one entry per cell an object overlaps, k counts the cells of each object row by row
+        owners = np.repeat(np.arange(len(counts)), counts)
+        k = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        y, x = np.divmod(k, columns[owners])
+        keys = cell_key(x0[owners] + x, y0[owners] + y)
+
+        # objects of a cell end up in no particular order, queries sort what they find
+        order = np.argsort(keys)
+        keys = keys[order]
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+        self.cells = (keys[starts], np.append(starts, len(keys)), owners[order])
+
+    def colliding(self, rect: pygame.Rect) -> list:
+        """ Objects whose rect overlaps the given one, in the order they were added"""
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.enter("collision")
+            hits = self.query(rect)
+            self.profiler.leave()
+            return hits
+        return self.query(rect)
+
+    def touching(self, rect: pygame.Rect, mask: pygame.mask.Mask) -> list:
+        """ Objects whose opaque pixels overlap those of the mask placed at rect, in the order they were added
+
+        Masks are only compared for objects whose rect overlaps, every object needs a 'mask' attribute.
+        """
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.enter("collision")
+            hits = self.query_indices(rect)
+            self.profiler.leave()
+        else:
+            hits = self.query_indices(rect)
+        touching = []
+        for i in hits:
+            game_object = self.objects[i]
+            left, top = self.bounds[i, :2].tolist()
+            if mask.overlap(game_object.mask, (left - rect.x, top - rect.y)):
+                touching.append(game_object)
+        return touching
+
+    def query(self, rect: pygame.Rect) -> list:
+        return [self.objects[i] for i in self.query_indices(rect)]
+
+    def query_indices(self, rect: pygame.Rect) -> list:
+        """ Indices of the objects whose bounds overlap the rect, ascending and without removed objects"""
+        if len(self.objects) <= self.linear_limit:
+            if self.rects is None:
+                rects = self.bounds.copy()
+                rects[:, 2:] -= rects[:, :2]
+                self.rects = [pygame.Rect(row) for row in rects.tolist()]
+            hits = rect.collidelistall(self.rects)
+        else:
+            hits = self.grid_query(rect)
+        if self.removed:
+            return [i for i in hits if self.objects[i] not in self.removed]
+        return hits
+
+    def grid_query(self, rect: pygame.Rect) -> list:
+        if self.cells is None:
+            self.build()
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        cell_keys, starts, cell_objects = self.cells
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        x0, y0, x1, y1 = self.cell_range(left, top, right, bottom)
+        keys = [cell_key(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        at = cell_keys.searchsorted(keys)
+        found = at[cell_keys.take(at, mode="clip") == keys].tolist()
+        if not found:
+            return []
+        if len(found) == 1:
+            candidates = cell_objects[starts[found[0]]:starts[found[0] + 1]]
+        else:
+            candidates = np.concatenate([cell_objects[starts[j]:starts[j + 1]] for j in found])
+
+        # only a handful of candidates, compared one by one, objects in several of the cells are found once
+        hits = set()
+        for i, (other_left, other_top, other_right, other_bottom) in zip(candidates.tolist(),
+                                                                         self.bounds[candidates].tolist()):
+            if other_left < right and other_right > left and other_top < bottom and other_bottom > top:
+                hits.add(i)
+        return sorted(hits)
+
+
+def cell_key(x, y):
+    """ One integer per grid cell, cells up to 2 ** 31 away from the origin get distinct keys"""
+    return x * (1 << 32) + y
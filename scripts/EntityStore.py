@@ -0,0 +1,331 @@
+import numpy as np
+import pygame
+
+
+class ObjectList:
+    """ List of game objects with O(1) removal
+
+    Objects killed during a tick stay where they are until compact() takes them all out at the end of it,
+    so the list is safe to iterate at any point of the tick. Removal moves objects from the end of the list
+    into the freed places, the order of objects is not kept.
+    """
+    def __init__(self):
+        self.objects = []
+        self.indices = dict()
+        # used as an insertion ordered set, compaction must not depend on object hashes
+        self.dying = dict()
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __getitem__(self, index):
+        return self.objects[index]
+
+    def __contains__(self, game_object):
+        """ Whether the object is here and was not killed"""
+        return game_object in self.indices and game_object not in self.dying
+
+    def append(self, game_object):
+        self.indices[game_object] = len(self.objects)
+        self.objects.append(game_object)
+
+    def kill(self, game_object):
+        """ Queue object for removal, killing it twice or killing an object that is not here does nothing"""
+        if game_object in self.indices:
+            self.dying[game_object] = None
+
+    def compact(self):
+        """ Remove every killed object, costs O(killed) no matter how long the list is"""
+        if not self.dying:
+            return
+
+        n = len(self.objects)
+        tail = n - len(self.dying)
+        dead = [self.indices.pop(game_object) for game_object in self.dying]
+        for game_object in self.dying:
+            self.release(game_object)
+
+        # survivors from the last len(dying) places fill the holes left before them
+        holes = [i for i in dead if i < tail]
+        dead_in_tail = set(i for i in dead if i >= tail)
+        movers = [i for i in range(tail, n) if i not in dead_in_tail]
+        self.move_rows(holes, movers)
+        for hole, mover in zip(holes, movers):
+            game_object = self.objects[mover]
+            self.objects[hole] = game_object
+            self.indices[game_object] = hole
+
+        del self.objects[tail:]
+        self.dying = dict()
+
+    def clear(self):
+        """ Remove every object at once, e.g. when the level they belong to is thrown away"""
+        for game_object in self.objects:
+            self.release(game_object)
+        self.objects = []
+        self.indices = dict()
+        self.dying = dict()
+
+    def release(self, game_object):
+        """ Called for every removed object before any other object is moved"""
+        pass
+
+    def move_rows(self, holes: list, movers: list):
+        """ Called with the indices objects are moved from and to, before the move"""
+        pass
+
+
+class EntityStore(ObjectList):
+    """ ObjectList whose objects keep their movement state in parallel NumPy arrays, row i belongs to objects[i]
+
+    Only objects with 'vectorized' set have their state moved into the arrays, others (like the boss) keep
+    their rows unused and are simulated by their own update method.
+    """
+    columns = ("position", "previous", "size", "remainder", "velocity", "health_points", "managed")
+
+    def __init__(self, capacity: int = 64):
+        super().__init__()
+        self.capacity = capacity
+        # x and y pairs are kept together so both axes are handled by the same array operation
+        self.position = np.zeros((capacity, 2), np.int64)
+        # positions before the last simulation step, drawing interpolates from them
+        self.previous = np.zeros((capacity, 2), np.int64)
+        self.size = np.zeros((capacity, 2), np.int64)
+        # sub-pixel remainders, see GameplayObject.move_float
+        self.remainder = np.zeros((capacity, 2), np.float64)
+        # px per tick
+        self.velocity = np.zeros((capacity, 2), np.float64)
+        self.health_points = np.zeros(capacity, np.int64)
+        self.managed = np.zeros(capacity, bool)
+
+    # single axis views of the pair arrays
+    x = property(lambda self: self.position[:, 0])
+    y = property(lambda self: self.position[:, 1])
+    width = property(lambda self: self.size[:, 0])
+    height = property(lambda self: self.size[:, 1])
+    dx = property(lambda self: self.remainder[:, 0])
+    dy = property(lambda self: self.remainder[:, 1])
+    vx = property(lambda self: self.velocity[:, 0])
+    vy = property(lambda self: self.velocity[:, 1])
+
+    def grow(self):
+        self.capacity *= 2
+        for name in self.columns:
+            column = getattr(self, name)
+            grown = np.zeros((self.capacity,) + column.shape[1:], column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def append(self, game_object):
+        i = len(self.objects)
+        if i == self.capacity:
+            self.grow()
+        super().append(game_object)
+
+        if not game_object.vectorized:
+            self.managed[i] = False
+            return
+
+        rect = game_object.rect
+        self.position[i] = rect.topleft
+        self.previous[i] = rect.topleft
+        self.size[i] = rect.size
+        self.remainder[i] = game_object.dx, game_object.dy
+        self.velocity[i] = game_object.velocity
+        self.health_points[i] = game_object.health_points
+        self.managed[i] = True
+        game_object.store = self
+        game_object.slot = i
+
+    def extend(self, game_objects: list, position, size, velocity, health_points):
+        """ Append new vectorized objects at once, their state given as arrays with one row per object
+
+        The objects' own state is not read, it is replaced by the given arrays.
+        """
+        start = len(self.objects)
+        end = start + len(game_objects)
+        while end > self.capacity:
+            self.grow()
+        for i, game_object in enumerate(game_objects, start):
+            self.indices[game_object] = i
+            game_object.store = self
+            game_object.slot = i
+        self.objects.extend(game_objects)
+
+        rows = slice(start, end)
+        self.position[rows] = position
+        self.previous[rows] = position
+        self.size[rows] = size
+        self.remainder[rows] = 0
+        self.velocity[rows] = velocity
+        self.health_points[rows] = health_points
+        self.managed[rows] = True
+
+    def release(self, game_object):
+        if game_object.vectorized:
+            game_object.detach()
+        if game_object.pool is not None:
+            game_object.pool.release(game_object)
+
+    def move_rows(self, holes: list, movers: list):
+        if not holes:
+            return
+        for name in self.columns:
+            column = getattr(self, name)
+            column[holes] = column[movers]
+        for hole, mover in zip(holes, movers):
+            game_object = self.objects[mover]
+            if game_object.vectorized:
+                game_object.slot = hole
+
+    def get_rect(self, slot: int) -> pygame.Rect:
+        return pygame.Rect(self.position[slot].tolist(), self.size[slot].tolist())
+
+    def set_rect(self, slot: int, rect: pygame.Rect):
+        self.position[slot] = rect.topleft
+        self.size[slot] = rect.size
+
+    def unmanaged(self, n: int = None) -> list:
+        """ Indices of the first n rows whose objects are not vectorized, they update and draw themselves"""
+        if n is None:
+            n = len(self.objects)
+        return (~self.managed[:n]).nonzero()[0].tolist()
+
+    def bounds(self) -> (np.ndarray, np.ndarray):
+        """ Positions and sizes of all objects in order, copied so they stay as they are while the store changes"""
+        n = len(self.objects)
+        position, size = self.position[:n].copy(), self.size[:n].copy()
+        # rows of objects that are not vectorized are unused, their rects are read instead
+        for i in self.unmanaged(n):
+            rect = self.objects[i].rect
+            position[i], size[i] = rect.topleft, rect.size
+        return position, size
+
+    def move(self, n: int = None):
+        """ GameplayObject.move_float by the stored velocity, for the first n rows at once"""
+        if n is None:
+            n = len(self.objects)
+        if n == 0:
+            return
+        remainder = self.remainder[:n]
+        remainder += self.velocity[:n]
+        step = np.trunc(remainder)
+        step[np.abs(remainder) <= 1] = 0
+        self.position[:n] += step.astype(np.int64)
+        remainder -= step
+
+    def snapshot(self):
+        """ Remember positions before a simulation step"""
+        n = len(self.objects)
+        self.previous[:n] = self.position[:n]
+        for i in self.unmanaged(n):
+            self.objects[i].snapshot()
+
+    def draw(self, screen: pygame.Surface, n: int = None, alpha: float = 1):
+        """ Draw the first n objects, alpha below 1 puts them between their previous and current positions
+
+        Objects entirely off the screen are skipped before any blit is made.
+        """
+        if n is None:
+            n = len(self.objects)
+        for i in self.unmanaged(n):
+            self.objects[i].draw(alpha)
+        position = self.position[:n]
+        if alpha < 1:
+            previous = self.previous[:n]
+            position = np.rint(previous + (position - previous) * alpha).astype(np.int64)
+        x, y = position.T
+        width, height = self.size[:n].T
+        screen_width, screen_height = screen.get_size()
+        visible = self.managed[:n] & (x < screen_width) & (x + width > 0) & (y < screen_height) & (y + height > 0)
+        rows = np.flatnonzero(visible)
+        objects = self.objects
+        screen.blits([(objects[i].image, topleft) for i, topleft in zip(rows.tolist(), position[rows].tolist())],
+                     False)
+
+
+def stored_column(column: str):
+    """ Property reading one array of the EntityStore while the object is stored, its own attribute otherwise"""
+    attribute = "_" + column
+
+    def get(self):
+        if self.store is None:
+            return getattr(self, attribute)
+        return getattr(self.store, column).item(self.slot)
+
+    def set(self, value):
+        if self.store is None:
+            setattr(self, attribute, value)
+        else:
+            getattr(self.store, column)[self.slot] = value
+
+    return property(get, set)
+
+
+class EntityView:
+    """ Mixin for game objects that can live in an EntityStore"""
+    vectorized = True
+    # whether update has anything to do once update_all ran, without it only objects that are not vectorized
+    # get their update called
+    update_each = True
+    store = None
+    slot = None
+    # ObjectPool the object goes back to once its store removes it
+    pool = None
+
+    _dx = 0
+    _dy = 0
+    _velocity = (0, 0)
+    _health_points = 0
+
+    dx = stored_column("dx")
+    dy = stored_column("dy")
+    health_points = stored_column("health_points")
+
+    @property
+    def rect(self) -> pygame.Rect:
+        if self.store is None:
+            return self._rect
+        return self.store.get_rect(self.slot)
+
+    @rect.setter
+    def rect(self, value: pygame.Rect):
+        if self.store is None:
+            self._rect = value
+        else:
+            self.store.set_rect(self.slot, value)
+
+    @property
+    def velocity(self) -> (float, float):
+        if self.store is None:
+            return self._velocity
+        return tuple(self.store.velocity[self.slot].tolist())
+
+    @velocity.setter
+    def velocity(self, value: (float, float)):
+        if self.store is None:
+            self._velocity = value
+        else:
+            self.store.velocity[self.slot] = value
+
+    def move_float(self, x: float, y: float):
+        if self.store is None:
+            super().move_float(x, y)
+            return
+        position, remainder = self.store.position[self.slot], self.store.remainder[self.slot]
+        for axis, value in enumerate((x, y)):
+            remainder[axis] += value
+            if abs(remainder[axis]) > 1:
+                step = int(remainder[axis])
+                position[axis] += step
+                remainder[axis] -= step
+
+    def detach(self):
+        """ Copy state out of the store back into the object, called when the store removes it"""
+        rect, dx, dy, velocity, health_points = self.rect, self.dx, self.dy, self.velocity, self.health_points
+        self.store = None
+        self.slot = None
+        self.rect, self.dx, self.dy, self.velocity, self.health_points = rect, dx, dy, velocity, health_points
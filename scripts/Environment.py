@@ -0,0 +1,265 @@
+import numpy as np
+import pygame
+
+from scripts.Game import Game
+from scripts.Input import KeyState
+from scripts.GameplayObjects import PowerupType
+
+# movement keys held and whether the player shoots, one entry per discrete action
+actions = tuple((keys, shooting) for shooting in (False, True) for keys in (
+    (), (pygame.K_a,), (pygame.K_d,), (pygame.K_w,), (pygame.K_s,)))
+powerup_types = tuple(PowerupType)
+
+
+class ActionInput:
+    """ Input source holding the keys of the last action, shooting is switched with space like a player would"""
+    def __init__(self):
+        self.game_instance = None
+        self.keys = KeyState()
+        self.shooting = False
+
+    def set_action(self, action: int):
+        keys, self.shooting = actions[action]
+        self.keys = KeyState(keys)
+
+    def get_events(self):
+        scene = self.game_instance.current_scene
+        if self.game_instance.current_scene_name != "gameplay" or not scene.is_active:
+            return []
+        if scene.game_objects["player"].is_shooting != self.shooting:
+            return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)]
+        return []
+
+    def get_pressed(self):
+        return self.keys
+
+
+class GameEnv:
+    """ One windowless game played through reset() and step(action), like a gym environment
+
+    Actions are indices into actions. Observations are either "features", a flat float32 vector describing
+    the player, the level and the first few of every kind of object, or "frames", the screen drawn in
+    grayscale and shrunk to frame_size as a (height, width) uint8 array. The reward of a step is how much the
+    score grew during it. A step is frame_skip ticks with the same action.
+    """
+    def __init__(self, observation: str = "features", seed: int = None, frame_skip: int = 1,
+                 max_ticks: int = None, frame_size: (int, int) = (80, 64), max_enemies: int = 64,
+                 max_projectiles: int = 32, max_powerups: int = 4):
+        if observation not in ("features", "frames"):
+            raise ValueError("observation must be features or frames, not {}".format(observation))
+        # drawing text is the only part of pygame a game without a window needs
+        pygame.font.init()
+        self.input = ActionInput()
+        self.game = Game(headless=True, input_source=self.input, seed=seed)
+        self.input.game_instance = self.game
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.frame_size = frame_size
+        self.frame = pygame.Surface(frame_size)
+        self.max_enemies = max_enemies
+        self.max_projectiles = max_projectiles
+        self.max_powerups = max_powerups
+
+        # player x, y, shooting, invincible and one flag per powerup type, level, boss health left
+        self.player_features = 4 + len(powerup_types)
+        self.level_features = 2
+        # x, y, vx, vy, health points and a flag telling the slot is used
+        self.enemy_features = 6
+        # x, y, vx, vy and the used flag
+        self.projectile_features = 5
+        # x, y, type and the used flag
+        self.powerup_features = 4
+        self.feature_size = (self.player_features + self.level_features + max_enemies * self.enemy_features +
+                             max_projectiles * self.projectile_features + max_powerups * self.powerup_features)
+        if observation == "features":
+            self.observation_shape = (self.feature_size,)
+            self.observation_dtype = np.float32
+        else:
+            self.observation_shape = (frame_size[1], frame_size[0])
+            self.observation_dtype = np.uint8
+
+        self.score = 0
+        self.level = None
+        self.ticks = 0
+        self.last_observation = np.zeros(self.observation_shape, self.observation_dtype)
+
+    @property
+    def scene(self):
+        return self.game.scenes["gameplay"]
+
+    @property
+    def action_count(self) -> int:
+        return len(actions)
+
+    def reset(self, seed: int = None, out: np.ndarray = None) -> (np.ndarray, dict):
+        """ Start a new game, the same seed and actions always play the same game"""
+        self.scene.seed = seed
+        self.game.load_scene("gameplay")
+        self.input.set_action(0)
+        self.score = 0
+        self.level = self.scene.current_level
+        self.ticks = 0
+        return self.observe(out), self.info()
+
+    def step(self, action: int, out: np.ndarray = None) -> (np.ndarray, float, bool, bool, dict):
+        """ Play one step, returns observation, reward, terminated (game over or won), truncated and info
+
+        The observation is written to out if given.
+        """
+        self.input.set_action(action)
+        for _ in range(self.frame_skip):
+            # the scene forgets its level when the game ends
+            self.level = self.scene.current_level
+            self.game.run()
+            self.ticks += 1
+            if self.game.current_scene_name != "gameplay":
+                break
+
+        terminated = self.game.current_scene_name != "gameplay"
+        truncated = not terminated and self.max_ticks is not None and self.ticks >= self.max_ticks
+        score = self.game.end_score if terminated else self.scene.score
+        reward = float(score - self.score)
+        self.score = score
+        if terminated:
+            # the scene is gone once the game ended, the observation before the last step stays the final one
+            observation = self.last_observation
+            if out is not None and out is not observation:
+                out[:] = observation
+                observation = out
+        else:
+            observation = self.observe(out)
+        return observation, reward, terminated, truncated, self.info()
+
+    def info(self) -> dict:
+        cause = None
+        if self.game.current_scene_name == "endscreen":
+            cause = self.game.end_cause
+        elif self.game.current_scene_name == "winscreen":
+            cause = "won"
+        return dict(score=self.score, level=self.level, ticks=self.ticks, cause=cause)
+
+    def close(self):
+        """ Let go of the game, call it once the environment is not used anymore"""
+        self.game.close()
+
+    def observe(self, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            out = np.zeros(self.observation_shape, self.observation_dtype)
+        if self.observation == "features":
+            self.features(out)
+        else:
+            self.draw_frame(out)
+        self.last_observation = out
+        return out
+
+    def draw_frame(self, out: np.ndarray):
+        screen = self.game.screen
+        screen.fill((0, 0, 0))
+        self.scene.draw()
+        pygame.transform.smoothscale(screen, self.frame_size, self.frame)
+        # brightest channel as gray, surfarray is indexed x first
+        out[:] = pygame.surfarray.pixels3d(self.frame).max(axis=2).T
+
+    def features(self, out: np.ndarray):
+        """ Fill out with the feature vector, coordinates are in screen sizes and velocities in px per tick"""
+        out[:] = 0
+        scene = self.scene
+        game_objects = scene.game_objects
+        width, height = self.game.width, self.game.height
+
+        player = game_objects["player"]
+        active = set(powerup.type for powerup in player.active_powerups)
+        out[:self.player_features] = [player.rect.centerx / width, player.rect.centery / height,
+                                      player.is_shooting, player.invincibility] + \
+                                     [powerup_type in active for powerup_type in powerup_types]
+        i = self.player_features
+        boss = game_objects.get("boss")
+        out[i:i + 2] = scene.current_level, boss.health_points / boss.max_hp if boss is not None else 0
+        i += self.level_features
+
+        enemies = self.store_features(game_objects["enemies"], self.max_enemies, health_points=True)
+        out[i:i + enemies.size] = enemies.ravel()
+        i += self.max_enemies * self.enemy_features
+
+        projectiles = self.store_features(game_objects["boss_projectiles"], self.max_projectiles)
+        out[i:i + projectiles.size] = projectiles.ravel()
+        i += self.max_projectiles * self.projectile_features
+
+        for powerup in game_objects["powerups"][:self.max_powerups]:
+            out[i:i + self.powerup_features] = (powerup.rect.centerx / width, powerup.rect.centery / height,
+                                                powerup_types.index(powerup.type), 1)
+            i += self.powerup_features
+
+    def store_features(self, store, limit: int, health_points: bool = False) -> np.ndarray:
+        """ Rows of x, y, vx, vy (and health points) and 1 for the first limit objects, straight from the arrays"""
+        n = min(len(store), limit)
+        rows = np.ones((n, self.enemy_features if health_points else self.projectile_features))
+        rows[:, 0:2] = store.position[:n] + store.size[:n] / 2
+        rows[:, 2:4] = store.velocity[:n]
+        if health_points:
+            rows[:, 4] = store.health_points[:n]
+        # objects simulating themselves (the boss) have no state in the arrays
+        for j in np.flatnonzero(~store.managed[:n]).tolist():
+            game_object = store[j]
+            speed = game_object.speed
+            rows[j, 0:2] = game_object.rect.center
+            rows[j, 2:4] = speed if isinstance(speed, tuple) else (speed, 0)
+            if health_points:
+                rows[j, 4] = game_object.health_points
+        rows[:, 0] /= self.game.width
+        rows[:, 1] /= self.game.height
+        return rows
+
+
+class VectorEnv:
+    """ Several independent GameEnv games stepped together in one process, with observations stacked into one array
+
+    Games that end are started again right away, the observation they ended with is kept in the info under
+    "final_observation".
+    """
+    def __init__(self, count: int, seed: int = None, **kwargs):
+        self.envs = [GameEnv(seed=None if seed is None else seed + i, **kwargs) for i in range(count)]
+        env = self.envs[0]
+        self.observations = np.zeros((count,) + env.observation_shape, env.observation_dtype)
+        self.final_observations = np.zeros_like(self.observations)
+
+    def __len__(self):
+        return len(self.envs)
+
+    @property
+    def action_count(self) -> int:
+        return len(actions)
+
+    def reset(self, seed: int = None) -> (np.ndarray, dict):
+        """ Start every game again, game i gets seed + i"""
+        for i, env in enumerate(self.envs):
+            env.reset(None if seed is None else seed + i, self.observations[i])
+        return self.observations.copy(), self.info()
+
+    def step(self, actions) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict):
+        """ Play one step of every game with actions[i] for game i"""
+        count = len(self.envs)
+        rewards = np.zeros(count, np.float32)
+        terminated = np.zeros(count, bool)
+        truncated = np.zeros(count, bool)
+        causes = [None] * count
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, rewards[i], terminated[i], truncated[i], info = env.step(int(action), self.observations[i])
+            if terminated[i] or truncated[i]:
+                causes[i] = info["cause"] or "tick limit"
+                self.final_observations[i] = observation
+                env.reset(out=self.observations[i])
+        info = self.info()
+        info["cause"] = causes
+        info["final_observation"] = self.final_observations.copy()
+        return self.observations.copy(), rewards, terminated, truncated, info
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+    def info(self) -> dict:
+        return dict(score=np.array([env.score for env in self.envs]),
+                    level=np.array([env.level for env in self.envs]),
+                    ticks=np.array([env.ticks for env in self.envs]))
@@ -0,0 +1,57 @@
+import time
+import pygame
+
+# every face and size the game draws text with, created up front by warm_up()
+ui_faces = (
+    ("monospace", 14),
+    ("monospace", 16),
+    ("monospace", 20),
+    ("monospace", 34),
+    ("monospace", 64),
+)
+
+
+class FontRegistry:
+    """ Fonts shared by the whole process, each face and size is looked up once
+
+    pygame.font.SysFont may list every font installed on the system (through fontconfig) before it opens one,
+    that is what made scene changes slow. Fonts are never dropped, there are only a handful of them.
+    """
+    def __init__(self):
+        self.fonts = dict()
+        self.hits = 0
+        self.misses = 0
+        # time spent creating fonts on misses
+        self.seconds = 0.0
+
+    def get(self, name: str, size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        start = time.perf_counter()
+        font = pygame.font.SysFont(name, size, bold, italic)
+        self.seconds += time.perf_counter() - start
+        self.fonts[key] = font
+        return font
+
+    def warm_up(self, faces=ui_faces):
+        """ Create the fonts of faces ((name, size) pairs) now, so no scene has to wait for them later"""
+        for name, size in faces:
+            # fonts already there do not count as hits, nobody asked for them
+            if (name, size, False, False) not in self.fonts:
+                self.get(name, size)
+
+    def stats(self) -> dict:
+        return dict(entries=len(self.fonts), hits=self.hits, misses=self.misses, ms=round(self.seconds * 1000, 1))
+
+
+fonts = FontRegistry()
+
+
+def get_font(name: str, size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+    """ Shared font of the given face and size, created the first time it is asked for"""
+    return fonts.get(name, size, bold, italic)
@@ -1,38 +1,157 @@
+import random
+import time
 import pygame
-from scripts.Scene import MainMenuScene, HelpScreenScene, GameplayScene, EndScreenScene, WinScreenScene, load_asset
+from scripts.Scene import MainMenuScene, HelpScreenScene, GameplayScene, EndScreenScene, WinScreenScene
+from scripts.Assets import load_asset
+from scripts.Input import KeyboardInput
+from scripts.Render import DirtyScreen
+from scripts.Profiler import Profiler
+from scripts.Preloader import Preloader
+from scripts.GarbageCollector import gc_policy
+
+
+class Scenes(dict):
+    """ Scenes by name, each one created the first time it is asked for"""
+    types = dict(
+        menu=MainMenuScene,
+        help=HelpScreenScene,
+        gameplay=GameplayScene,
+        endscreen=EndScreenScene,
+        winscreen=WinScreenScene,
+    )
+
+    def __init__(self, game_instance):
+        super().__init__()
+        self.game_instance = game_instance
+
+    def __missing__(self, name: str):
+        scene = self[name] = self.types[name](self.game_instance)
+        return scene
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless: bool = False, input_source=None, dirty_rects: bool = False, fps: int = 60,
+                 frame_budget: bool = False, seed: int = None):
         self.width = 800
         self.height = 640
-        self.fps = 60
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("Space Invaders")
-        pygame.display.set_icon(load_asset("assets/icon.jpg"))
+        # rendered frames per second at most, 0 renders as often as the machine can
+        self.fps = fps
+        # simulation steps per second, every gameplay speed and duration is given per step
+        self.tick_rate = 60
+        self.step_time = 1 / self.tick_rate
+        self.accumulator = 0.0
+        # longest stretch of time simulated after one frame, anything longer is not caught up and slows the game
+        self.max_frame_time = 0.25
+        # instead, skip drawing frames while more than max_frame_time is owed, until the simulation catches up
+        self.frame_budget = frame_budget
+        self.max_dropped_frames = 5
+        self.dropped_in_row = 0
+        self.steps = 0
+        self.frames_rendered = 0
+        self.frames_dropped = 0
+        self.headless = headless
+        # headless games never open a window, objects are still simulated but not drawn
+        self.draw_enabled = not headless
+        # gameplay sprites come from one packed surface instead of one surface per image
+        self.sprite_atlas = True
+        if headless:
+            self.screen = pygame.Surface((self.width, self.height))
+        else:
+            self.screen = pygame.display.set_mode((self.width, self.height))
+            pygame.display.set_caption("Space Invaders")
+            pygame.display.set_icon(load_asset("assets/icon.jpg"))
+        # only the areas drawn on are erased and pushed to the display, instead of all of it every frame
+        self.dirty_rects = dirty_rects and not headless
+        if self.dirty_rects:
+            self.screen = DirtyScreen(self.screen)
+        self.input = input_source if input_source else KeyboardInput()
+        # every random choice of the game comes from here, see GameplayScene.load
+        self.random = random.Random(seed)
+        # gets every handled event and every simulation step, see scripts.Replay
+        self.recorder = None
+        # toggled with F3, costs next to nothing while it is off
+        self.profiler = Profiler(self)
+        # prepares the next scene on a worker thread while the menu is shown, see preload_gameplay in scripts.Scene
+        self.preloader = Preloader()
+        # seconds the last restart() took, from pressing 'r' to the new game being ready
+        self.restart_time = None
         self.clock = pygame.time.Clock()
         self.current_scene = None
+        self.current_scene_name = None
         self.is_running = True
         self.end_score = 0
-        self.scenes = dict(
-            menu=MainMenuScene(self),
-            help=HelpScreenScene(self),
-            gameplay=GameplayScene(self),
-            endscreen=EndScreenScene(self),
-            winscreen=WinScreenScene(self),
-        )
+        # what killed the player in the last game, None if they won or are still playing
+        self.end_cause = None
+        # only scenes that are loaded get created, a game that never ends never builds the end screens
+        self.scenes = Scenes(self)
+        # time spent setting up is not owed to the simulation
+        self.clock.tick()
 
     def run(self):
-        self.screen.fill((0, 0, 0))
+        self.profiler.begin_frame()
+        if self.headless:
+            # run as fast as possible, there is no display to wait for
+            self.handle_events()
+            self.step()
+            self.profiler.end_frame()
+            gc_policy.end_of_frame()
+            return
+
+        self.profiler.enter("wait")
+        elapsed = self.clock.tick(self.fps) / 1000
+        self.profiler.leave()
+        if not self.frame_budget:
+            elapsed = min(elapsed, self.max_frame_time)
+        self.accumulator += elapsed
+        behind = self.frame_budget and self.accumulator > self.max_frame_time
+
         self.handle_events()
+        while self.accumulator >= self.step_time and self.is_running:
+            self.step()
+            self.accumulator -= self.step_time
 
-        self.current_scene.tick()
+        if behind and self.dropped_in_row < self.max_dropped_frames:
+            self.frames_dropped += 1
+            self.dropped_in_row += 1
+        else:
+            self.render(self.accumulator / self.step_time)
+        self.profiler.end_frame()
+        # after the frame is shown, a collection asked for during it holds up the next one at most
+        gc_policy.end_of_frame()
 
-        self.clock.tick(self.fps)
-        pygame.display.flip()
+    def step(self):
+        self.profiler.enter("update")
+        self.current_scene.update()
+        self.profiler.leave()
+        self.steps += 1
+        if self.recorder is not None:
+            self.recorder.on_step()
+
+    def render(self, alpha: float = 1):
+        self.profiler.enter("draw")
+        if self.dirty_rects:
+            self.screen.clear()
+        else:
+            self.screen.fill((0, 0, 0))
+
+        self.current_scene.draw(alpha)
+        self.profiler.leave()
+        self.profiler.draw_overlay(self.screen)
+
+        self.profiler.enter("flip")
+        if self.dirty_rects:
+            self.screen.present()
+        else:
+            pygame.display.flip()
+        self.profiler.leave()
+        self.frames_rendered += 1
+        self.dropped_in_row = 0
 
     def handle_events(self):
-        for event in pygame.event.get():
+        self.profiler.enter("events")
+        for event in self.input.get_events():
+            if self.recorder is not None:
+                self.recorder.on_event(event)
             if event.type == pygame.QUIT:
                 self.is_running = False
                 break
@@ -40,12 +159,29 @@ class Game:
                 if event.key == pygame.K_ESCAPE:
                     self.is_running = False
                     break
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
 
             self.current_scene.handle_event(event)
+        self.profiler.leave()
+
+    def restart(self):
+        """ Play again, the gameplay scene still has its sprites, fonts and HUD from the game before"""
+        start = time.perf_counter()
+        self.load_scene("gameplay")
+        self.restart_time = time.perf_counter() - start
+
+    def close(self):
+        """ Called once the game will not be played anymore, so it can be collected like any other garbage"""
+        self.is_running = False
+        gc_policy.release()
 
     def load_scene(self, scene_name: str):
         if self.current_scene:
             self.current_scene.unload()
+        # the garbage of the old scene is collected at the end of the frame, if the new one is static
+        gc_policy.scene_change(scene_name)
         self.current_scene = self.scenes[scene_name]
+        self.current_scene_name = scene_name
         self.current_scene.load()
         return self
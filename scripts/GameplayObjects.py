@@ -1,20 +1,26 @@
+import numpy as np
 import pygame
 
 from enum import Enum
 from math import sin, cos, sqrt, pi
-from random import randint
+
+from scripts.EntityStore import ObjectList, EntityView
+from scripts.Collision import sprite_mask
 
 
 class GameplayObject:
-    def __init__(self, game_instance):
-        self.game_instance = game_instance
-        self.scene_instance = game_instance.current_scene
+    def __init__(self, scene_instance):
+        # objects belong to the scene they are made for, which need not be the game's current one
+        self.scene_instance = scene_instance
+        self.game_instance = scene_instance.game_instance
         self.image = None
         self.rect = None
 
         # used in move_float method
         self.dx = 0
         self.dy = 0
+        # position before the last simulation step, drawing interpolates from it
+        self.previous_position = None
 
     def update(self):
         raise NotImplementedError
@@ -22,8 +28,19 @@ class GameplayObject:
     def handle_input(self):
         pass
 
-    def draw(self):
-        self.game_instance.screen.blit(self.image, self.rect)
+    def snapshot(self):
+        self.previous_position = self.rect.topleft
+
+    def draw_position(self, alpha: float) -> (int, int):
+        """ Position between the one before the last simulation step (alpha 0) and the current one (alpha 1)"""
+        x, y = self.rect.topleft
+        if self.previous_position is None or alpha >= 1:
+            return x, y
+        previous_x, previous_y = self.previous_position
+        return round(previous_x + (x - previous_x) * alpha), round(previous_y + (y - previous_y) * alpha)
+
+    def draw(self, alpha: float = 1):
+        self.game_instance.screen.blit(self.image, self.draw_position(alpha))
 
     # since rect stores (x,y) values as ints this helper function allows for game_objects to be moved by
     # finer values storing exact change in position and moving object only by the integer part
@@ -49,8 +66,8 @@ class PowerupType(Enum):
 
 
 class Powerup(GameplayObject):
-    def __init__(self, game_instance, image: pygame.Surface, powerup_type: PowerupType):
-        super().__init__(game_instance)
+    def __init__(self, scene_instance, image: pygame.Surface, powerup_type: PowerupType):
+        super().__init__(scene_instance)
         self.image = image.copy()
         self.rect = self.image.get_rect()
         self.player = None
@@ -117,49 +134,62 @@ class Powerup(GameplayObject):
 
     def die(self, look_in_player: bool = False):
         if look_in_player:
-            powerups = self.player.active_powerups
+            self.player.active_powerups.kill(self)
         else:
-            powerups = self.scene_instance.game_objects["powerups"]
-        for i in range(len(powerups)):
-            if self == powerups[i]:
-                del powerups[i]
-                break
+            self.scene_instance.game_objects["powerups"].kill(self)
 
 
-class Projectile(GameplayObject):
+class Projectile(EntityView, GameplayObject):
     def __init__(self,
-                 game_instance,
+                 scene_instance,
                  image: pygame.Surface,
                  pos: (int, int),
                  travel_speed: int,
                  damage: int):
 
-        super().__init__(game_instance)
-        self.image = image.copy()
+        super().__init__(scene_instance)
+        # needed when player gets 'ghostBullets' powerup
+        self.enemies_hit = list()
+        self.spawn(image, pos, travel_speed, damage)
+
+    def spawn(self, image: pygame.Surface, pos: (int, int), travel_speed: int, damage: int):
+        """ Put the projectile into play, called again every time a pooled projectile is reused"""
+        # all projectiles share one sprite that is never drawn on
+        self.image = image
         self.rect = self.image.get_rect()
+        self.mask = sprite_mask(image)
         self.rect.move_ip(pos[0] - self.rect.width / 2, pos[1])
+        self.dx = 0
+        self.dy = 0
         self.player_instance = self.scene_instance.game_objects["player"]
         self.travel_speed = travel_speed
+        self.velocity = (0, -travel_speed)
         self.damage = damage
-        self.scene_instance.game_objects["player_projectiles"].append(self)
+        self.enemies_hit.clear()
 
-        # needed when player gets 'ghostBullets' powerup
-        self.enemies_hit = list()
+        self.scene_instance.game_objects["player_projectiles"].append(self)
 
-    def update(self):
-        if not self.scene_instance.is_active:
+    @staticmethod
+    def update_all(projectiles, scene_instance, n: int):
+        """ Movement and off screen removal of the first n stored projectiles in one step"""
+        if not scene_instance.is_active:
             return
 
-        self.move_float(0, -self.travel_speed)
+        projectiles.move(n)
 
         # remove off screen projectiles
-        if self.rect.y < -self.rect.height:
-            self.die()
+        off_screen = projectiles.managed[:n] & (projectiles.y[:n] < -projectiles.height[:n])
+        for projectile in [projectiles[i] for i in np.flatnonzero(off_screen)]:
+            projectile.die()
+
+    def update(self):
+        # movement is done by Projectile.update_all, which may have already killed this projectile
+        if not self.scene_instance.is_active or self not in self.scene_instance.game_objects["player_projectiles"]:
             return
 
         # check for collision with enemy ships
-        for enemy in self.scene_instance.game_objects["enemies"]:
-            if self.rect.colliderect(enemy.rect) and enemy not in self.enemies_hit:
+        for enemy in self.scene_instance.broadphase["enemies"].touching(self.rect, self.mask):
+            if enemy not in self.enemies_hit:
                 enemy.damage(self.damage)
                 self.enemies_hit.append(enemy)
                 for powerup in self.player_instance.active_powerups:
@@ -172,58 +202,66 @@ class Projectile(GameplayObject):
     def die(self):
         if not self.scene_instance.is_active:
             return
-        player_projectiles = self.scene_instance.game_objects["player_projectiles"]
-        for i in range(len(player_projectiles)):
-            if self == player_projectiles[i]:
-                del player_projectiles[i]
-                break
+        self.scene_instance.game_objects["player_projectiles"].kill(self)
+
 
+class BossProjectile(EntityView, GameplayObject):
+    # everything is done by update_all
+    update_each = False
 
-class BossProjectile(GameplayObject):
     def __init__(self,
-                 game_instance,
+                 scene_instance,
                  image: pygame.Surface,
                  pos: (int, int),
                  travel_vector: (float, float),
                  travel_speed: int):
 
-        super().__init__(game_instance)
-        self.image = image.copy()
+        super().__init__(scene_instance)
+        self.spawn(image, pos, travel_vector, travel_speed)
+
+    def spawn(self, image: pygame.Surface, pos: (int, int), travel_vector: (float, float), travel_speed: int):
+        """ Put the projectile into play, called again every time a pooled projectile is reused"""
+        # all projectiles of a type share one sprite that is never drawn on
+        self.image = image
         self.rect = self.image.get_rect()
+        self.mask = sprite_mask(image)
         self.rect.move_ip(pos[0] - self.rect.width / 2, pos[1])
+        self.dx = 0
+        self.dy = 0
         self.travel_vector = travel_vector
         self.travel_speed = travel_speed
+        self.velocity = (travel_vector[0] * travel_speed, travel_vector[1] * travel_speed)
         self.scene_instance.game_objects["boss_projectiles"].append(self)
         self.player = self.scene_instance.game_objects["player"]
 
-    def update(self):
-        if not self.scene_instance.is_active:
+    @staticmethod
+    def update_all(boss_projectiles, scene_instance, n: int):
+        """ Movement and off screen removal of the first n stored boss projectiles in one step"""
+        if not scene_instance.is_active:
             return
 
-        self.move_float(
-            self.travel_vector[0] * self.travel_speed,
-            self.travel_vector[1] * self.travel_speed
-        )
+        boss_projectiles.move(n)
 
         # remove off screen projectiles
-        if self.rect.y > self.game_instance.height:
-            self.die()
-            return
+        off_screen = boss_projectiles.managed[:n] & (boss_projectiles.y[:n] > scene_instance.game_instance.height)
+        for projectile in [boss_projectiles[i] for i in np.flatnonzero(off_screen)]:
+            projectile.die()
+
+    def update(self):
+        # everything is done by BossProjectile.update_all
+        pass
 
     def die(self):
-        boss_projectiles = self.scene_instance.game_objects["boss_projectiles"]
-        for i in range(len(boss_projectiles)):
-            if self == boss_projectiles[i]:
-                del boss_projectiles[i]
-                break
+        self.scene_instance.game_objects["boss_projectiles"].kill(self)
 
 
 class Player(GameplayObject):
-    def __init__(self, game_instance, image: pygame.Surface):
-        super().__init__(game_instance)
+    def __init__(self, scene_instance, image: pygame.Surface):
+        super().__init__(scene_instance)
         self.width = 60
         self.height = 65
         self.image = image
+        self.mask = sprite_mask(image)
         self.rect = self.image.get_rect()
         self.rect.move_ip((self.game_instance.width - self.width) / 2, self.game_instance.height - self.height - 10)
 
@@ -242,15 +280,16 @@ class Player(GameplayObject):
         self.shooting_cooldown = 0
         self.projectile_speed = 12
         self.projectile_damage = 1
-        self.active_powerups = list()
+        self.active_powerups = ObjectList()
         self.invincibility = False
         self.shield_surface = self.scene_instance.images["player_shield"]
         self.shield_surface.set_alpha(100)
 
-    def draw(self):
-        self.game_instance.screen.blit(self.image, self.rect)
+    def draw(self, alpha: float = 1):
+        x, y = self.draw_position(alpha)
+        self.game_instance.screen.blit(self.image, (x, y))
         if self.invincibility:
-            self.game_instance.screen.blit(self.shield_surface, (self.rect.x - 3, self.rect.y + 2))
+            self.game_instance.screen.blit(self.shield_surface, (x - 3, y + 2))
 
     def update_speed(self):
         self.current_speed["x"] *= self.speed_dumping_factor
@@ -287,15 +326,15 @@ class Player(GameplayObject):
             self.current_speed["y"] = 0
 
     def shoot(self):
-        Projectile(self.game_instance,
-                   self.scene_instance.images["projectile"],
-                   (self.rect.x + self.width / 2, self.rect.y),
-                   self.projectile_speed,
-                   self.projectile_damage
-                   )
+        self.scene_instance.pools["player_projectiles"].spawn(
+            self.scene_instance.images["projectile"],
+            (self.rect.x + self.width / 2, self.rect.y),
+            self.projectile_speed,
+            self.projectile_damage
+        )
 
     def handle_input(self):
-        pressed = pygame.key.get_pressed()
+        pressed = self.game_instance.input.get_pressed()
         if pressed[pygame.K_a]:
             self.current_speed["x"] -= self.acceleration
         if pressed[pygame.K_d]:
@@ -313,30 +352,29 @@ class Player(GameplayObject):
         if not self.scene_instance.is_active:
             return
 
+        broadphase = self.scene_instance.broadphase
         if not self.invincibility:
-            # check for collision with enemy ships
-            for enemy in self.scene_instance.game_objects["enemies"]:
-                if self.rect.colliderect(enemy.rect):
-                    self.die()
-                    return
+            # check for collision with enemy ships, only opaque pixels count
+            enemies = broadphase["enemies"].touching(self.rect, self.mask)
+            if enemies:
+                self.die("boss" if isinstance(enemies[0], Boss) else "enemy ship")
+                return
 
             # check for collision with enemy projectiles
-            for boss_projectiles in self.scene_instance.game_objects["boss_projectiles"]:
-                if self.rect.colliderect(boss_projectiles.rect):
-                    self.die()
-                    return
+            if broadphase["boss_projectiles"].touching(self.rect, self.mask):
+                self.die("boss projectile")
+                return
 
         # check for collision with powerups
-        for powerup in self.scene_instance.game_objects["powerups"]:
-            if self.rect.colliderect(powerup.rect):
-                found = False
-                for active_powerup in self.active_powerups:
-                    if powerup.type.value == active_powerup.type.value:
-                        active_powerup.duration = active_powerup.start_duration
-                        found = True
-                if not found:
-                    powerup.on_pickup()
-                powerup.die()
+        for powerup in broadphase["powerups"].colliding(self.rect):
+            found = False
+            for active_powerup in self.active_powerups:
+                if powerup.type.value == active_powerup.type.value:
+                    active_powerup.duration = active_powerup.start_duration
+                    found = True
+            if not found:
+                powerup.on_pickup()
+            powerup.die()
 
         # movement
         self.update_speed()
@@ -355,54 +393,76 @@ class Player(GameplayObject):
         for powerup in self.active_powerups:
             powerup.update()
 
-    def die(self):
+    def die(self, cause: str = None):
         self.game_instance.end_score = self.scene_instance.score
+        self.game_instance.end_cause = cause
         self.game_instance.load_scene("endscreen")
 
 
-class Enemy(GameplayObject):
+class Enemy(EntityView, GameplayObject):
+    y_jump = 50
+    # stored enemies are moved by update_all, only the boss updates itself
+    update_each = False
+
     def __init__(self,
-                 game_instance,
+                 scene_instance,
                  image: pygame.Surface,
                  pos: (int, int),
                  health_points: int = 1,
                  powerup: Powerup = None,
                  score_value: int = 100):
 
-        super().__init__(game_instance)
+        super().__init__(scene_instance)
         self.image = image.copy()
+        # the copy has the same pixels, the mask is shared with every enemy using the sprite
+        self.mask = sprite_mask(image)
         self.rect = self.image.get_rect()
         self.rect.move_ip(pos[0], pos[1])
         self.speed = (2, 0)
         self.width = self.rect.width
         self.height = self.rect.width
-        self.y_jump = 50
         self.health_points = health_points
         self.powerup = powerup
         self.score_value = score_value
 
-    def update(self):
-        if not self.scene_instance.is_active:
+    # enemies move along their velocity, Boss keeps a plain number here
+    speed = EntityView.velocity
+
+    @classmethod
+    def update_all(cls, enemies, scene_instance, n: int):
+        """ Movement of the first n stored enemies in one step, enemies that are not vectorized move in update"""
+        if not scene_instance.is_active:
             return
 
-        self.move_float(self.speed[0], self.speed[1])
+        enemies.move(n)
+
+        managed = enemies.managed[:n]
+        x, y, width, height = enemies.x[:n], enemies.y[:n], enemies.width[:n], enemies.height[:n]
+        vx = enemies.vx[:n]
+        screen_width = scene_instance.game_instance.width
 
         # change direction
-        if self.rect.x < 0 or self.rect.x + self.width > self.game_instance.width:
-            self.speed = (-self.speed[0], self.speed[1])
-            self.rect.y += self.y_jump
+        bounced = managed & ((x < 0) | (x + width > screen_width))
+        vx[bounced] = -vx[bounced]
+        y[bounced] += cls.y_jump
 
         # make sure enemy is right at the edge of screen
-        if self.rect.x < 0:
-            self.rect.x = 0
-        elif self.rect.x + self.width > self.game_instance.width:
-            self.rect.x = self.game_instance.width - self.width
+        x[managed & (x < 0)] = 0
+        past_right_edge = managed & (x + width > screen_width)
+        x[past_right_edge] = screen_width - width[past_right_edge]
 
         # end the game if enemy touched the bottom of screen
-        if self.rect.y + self.rect.height > self.game_instance.height:
-            self.scene_instance.game_objects["player"].die()
+        if np.any(managed & (y + height > scene_instance.game_instance.height)):
+            scene_instance.game_objects["player"].die("invasion")
+
+    def update(self):
+        # movement is done by Enemy.update_all
+        pass
 
     def die(self):
+        enemies = self.scene_instance.game_objects["enemies"]
+        if self not in enemies:
+            return
         self.scene_instance.score += self.score_value
 
         # spawn powerup on death
@@ -414,13 +474,9 @@ class Enemy(GameplayObject):
             self.powerup.move_float(x, y)
             self.scene_instance.game_objects["powerups"].append(self.powerup)
 
-        enemies = self.scene_instance.game_objects["enemies"]
-        for i in range(len(enemies)):
-            if self == enemies[i]:
-                del enemies[i]
-                break
-
-        self.scene_instance.check_for_end()
+        # taken out of the list at the end of the tick, when GameplayScene also checks for the end of level
+        enemies.kill(self)
+        self.scene_instance.broadphase["enemies"].remove(self)
 
     def damage(self, value: int):
         self.health_points -= value
@@ -433,11 +489,14 @@ class Enemy(GameplayObject):
 
 
 class Boss(Enemy):
-    def __init__(self, game_instance, images: dict):
-        x = (game_instance.width - images["boss"].get_rect().width) / 2
+    # the boss moves and shoots on its own, it is only kept in the enemies store
+    vectorized = False
+
+    def __init__(self, scene_instance, images: dict):
+        x = (scene_instance.game_instance.width - images["boss"].get_rect().width) / 2
         self.max_hp = 120
 
-        super().__init__(game_instance, images["boss"], (x, 30), self.max_hp, score_value=100000)
+        super().__init__(scene_instance, images["boss"], (x, 30), self.max_hp, score_value=100000)
 
         self.speed = 1.5
         self.projectile = images["enemy_projectile"]
@@ -488,37 +547,33 @@ class Boss(Enemy):
             self.next_phase()
 
     def shoot(self):
+        pool = self.scene_instance.pools["boss_projectiles"]
         if self.current_phase == 0:
-            BossProjectile(self.game_instance,
-                           self.projectile,
-                           (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
-                           # self.get_vector_to(self.scene_instance.game_objects["player"]),
-                           (0, 1),
-                           self.projectile_speed)
+            pool.spawn(self.projectile,
+                       (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
+                       # self.get_vector_to(self.scene_instance.game_objects["player"]),
+                       (0, 1),
+                       self.projectile_speed)
 
         elif self.current_phase == 1:
-            BossProjectile(self.game_instance,
-                           self.projectile_directed,
-                           (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
-                           self.get_vector_to(self.scene_instance.game_objects["player"]),
-                           self.projectile_speed)
+            pool.spawn(self.projectile_directed,
+                       (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
+                       self.get_vector_to(self.scene_instance.game_objects["player"]),
+                       self.projectile_speed)
 
         elif self.current_phase == 2:
-            BossProjectile(self.game_instance,
-                           self.projectile_spread,
-                           (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
-                           (0, 1),
-                           self.projectile_speed)
-            BossProjectile(self.game_instance,
-                           self.projectile_spread,
-                           (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
-                           self.rotate_vector((0, 1), pi / 6),
-                           self.projectile_speed)
-            BossProjectile(self.game_instance,
-                           self.projectile_spread,
-                           (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
-                           self.rotate_vector((0, 1), -pi / 6),
-                           self.projectile_speed)
+            pool.spawn(self.projectile_spread,
+                       (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
+                       (0, 1),
+                       self.projectile_speed)
+            pool.spawn(self.projectile_spread,
+                       (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
+                       self.rotate_vector((0, 1), pi / 6),
+                       self.projectile_speed)
+            pool.spawn(self.projectile_spread,
+                       (self.rect.x + self.width / 2, self.rect.y + self.rect.height - 10),
+                       self.rotate_vector((0, 1), -pi / 6),
+                       self.projectile_speed)
 
     def next_phase(self):
         self.current_phase += 1
@@ -545,12 +600,12 @@ class Boss(Enemy):
         # spawn enemies with powerups on phase change
         if self.current_phase == 0:
             powerup = Powerup(
-                self.game_instance,
+                self.scene_instance,
                 self.scene_instance.images["powerup_speed"],
                 PowerupType.SPEED)
             self.scene_instance.game_objects["enemies"].append(
                 Enemy(
-                    self.game_instance,
+                    self.scene_instance,
                     self.scene_instance.images["enemy_special"],
                     (self.rect.x + 50, self.rect.y + 100),
                     powerup=powerup,
@@ -560,12 +615,12 @@ class Boss(Enemy):
             )
         elif self.current_phase == 1:
             powerup = Powerup(
-                self.game_instance,
+                self.scene_instance,
                 self.scene_instance.images["powerup_invincibility"],
                 PowerupType.INVINCIBILITY
             )
             enemy = Enemy(
-                self.game_instance,
+                self.scene_instance,
                 self.scene_instance.images["enemy_special"],
                 (self.rect.x - 50, self.rect.y + 100),
                 powerup=powerup,
@@ -577,18 +632,18 @@ class Boss(Enemy):
 
         else:
             powerup1 = Powerup(
-                self.game_instance,
+                self.scene_instance,
                 self.scene_instance.images["powerup_power"],
                 PowerupType.POWER
             )
             powerup2 = Powerup(
-                self.game_instance,
+                self.scene_instance,
                 self.scene_instance.images["powerup_invincibility"],
                 PowerupType.INVINCIBILITY
             )
             self.scene_instance.game_objects["enemies"].append(
                 Enemy(
-                    self.game_instance,
+                    self.scene_instance,
                     self.scene_instance.images["enemy_special"],
                     (self.rect.x - 50, self.rect.y + 100),
                     powerup=powerup1,
@@ -598,7 +653,7 @@ class Boss(Enemy):
             )
             self.scene_instance.game_objects["enemies"].append(
                 Enemy(
-                    self.game_instance,
+                    self.scene_instance,
                     self.scene_instance.images["enemy_special"],
                     (self.rect.x + 50, self.rect.y + 100),
                     powerup=powerup2,
@@ -608,10 +663,10 @@ class Boss(Enemy):
             )
 
     def spawn_ship(self):
-        for i in range(randint(1, 3)):
+        for i in range(self.game_instance.random.randint(1, 3)):
             self.scene_instance.game_objects["enemies"].append(
                 Enemy(
-                    self.game_instance,
+                    self.scene_instance,
                     self.scene_instance.images["enemy"],
                     (self.rect.x - 50 * (i + 1), self.rect.y + 100),
                     score_value=1000
@@ -619,7 +674,7 @@ class Boss(Enemy):
             )
             self.scene_instance.game_objects["enemies"].append(
                 Enemy(
-                    self.game_instance,
+                    self.scene_instance,
                     self.scene_instance.images["enemy"],
                     (self.rect.x + 50 * (i + 1), self.rect.y + 100),
                     score_value=1000
@@ -642,31 +697,3 @@ class Boss(Enemy):
         x = cos(alpha) * vector[0] - sin(alpha) * vector[1]
         y = sin(alpha) * vector[0] + cos(alpha) * vector[1]
         return x, y
-
-
-class Particle(GameplayObject):
-    def __init__(self, game_instance, particles: list, pos: (int, int) = (None, None), speed: float = 1) -> None:
-        super().__init__(game_instance)
-        self.particles = particles
-        self.speed = speed
-
-        if pos[0] is not None:
-            self.position = pos
-        else:
-            self.position = (randint(0, game_instance.width), 0)
-
-        self.particles.append(self)
-
-    def update(self):
-        self.position = (self.position[0], self.position[1] + self.speed)
-        if self.position[1] > self.game_instance.height:
-            self.die()
-
-    def draw(self):
-        self.game_instance.screen.fill((255, 255, 255), pygame.Rect(self.position[0], self.position[1], 1, 1))
-
-    def die(self):
-        for i in range(len(self.particles)):
-            if self == self.particles[i]:
-                del self.particles[i]
-                break
@@ -0,0 +1,140 @@
+import csv
+import gc
+
+from collections import deque, namedtuple
+from time import perf_counter
+
+# one run of the cyclic garbage collector, reason is the safe point GcPolicy ran it at or "automatic"
+GcPause = namedtuple("GcPause", ("at", "generation", "ms", "collected", "uncollectable", "scene", "reason"))
+
+
+class GcPolicy:
+    """ Decides when the cyclic garbage collector runs, and records how long every collection took
+
+    Managed (the default), no collection runs inside a simulation tick. freeze() is the only place anything is
+    frozen: once per process, at the first scene change, everything alive after a full collection (modules and
+    caches, which live as long as the process) is moved out of every later collection. A game that is thrown
+    away calls release(), which unfreezes and collects, so the freeze never keeps a game alive.
+
+    Full collections only run for the menu and the end screens, at the end of the frame they were loaded in.
+    They show static text, a pause there cannot be seen. Besides those, only freeze() and release() collect
+    everything. Starting a game, from the menu or by playing again, never collects, the game before it was
+    collected when its end screen came up. A level switch asks for a collection of the young generations only,
+    also at the end of the frame (safe_point). While the gameplay scene is on, the generation 0 threshold is
+    raised far enough that the few objects a tick allocates practically never start a collection by themselves.
+
+    Unmanaged, Python collects whenever it decides to and every scene change does a full collection right away,
+    as the scenes used to in unload(). Pauses are recorded either way.
+    """
+    # scenes a full collection may run in, everything they show is static
+    collecting_scenes = ("menu", "help", "endscreen", "winscreen")
+
+    def __init__(self, managed: bool = True, gameplay_threshold: int = 50000, max_pauses: int = 100000):
+        self.managed = managed
+        self.gameplay_threshold = gameplay_threshold
+        self.default_threshold = gc.get_threshold()
+        self.frozen = False
+        # (reason, generation) of a collection waiting for the end of the frame
+        self.pending = None
+        # name of the scene loaded last, stored with every pause
+        self.scene = None
+        self.reason = "automatic"
+        self.started = None
+        self.start = perf_counter()
+        self.pauses = deque(maxlen=max_pauses)
+        gc.callbacks.append(self.on_collection)
+
+    def on_collection(self, phase: str, info: dict):
+        if phase == "start":
+            self.started = perf_counter()
+            return
+        if self.started is None:
+            return
+        now = perf_counter()
+        self.pauses.append(GcPause(now - self.start, info["generation"], (now - self.started) * 1000,
+                                   info["collected"], info["uncollectable"], self.scene, self.reason))
+        self.started = None
+
+    def collect(self, reason: str, generation: int = 2):
+        """ Collect right now, call it only where a pause cannot be seen"""
+        self.reason = reason
+        try:
+            gc.collect(generation)
+        finally:
+            self.reason = "automatic"
+
+    def freeze(self):
+        """ Collect everything and freeze what is left, once per process until release()"""
+        if not self.managed or self.frozen:
+            return
+        self.collect("freeze")
+        gc.freeze()
+        self.frozen = True
+
+    def release(self):
+        """ Called when a game is thrown away, whatever the freeze kept alive can be collected again"""
+        self.pending = None
+        if not self.frozen:
+            return
+        gc.unfreeze()
+        self.frozen = False
+        self.collect("release")
+
+    def scene_change(self, scene_name: str):
+        """ Called between unloading a scene and loading the next one"""
+        self.scene = scene_name
+        if not self.managed:
+            gc.set_threshold(*self.default_threshold)
+            self.collect("scene change")
+            return
+
+        self.freeze()
+        if scene_name == "gameplay":
+            gc.set_threshold(self.gameplay_threshold, *self.default_threshold[1:])
+        else:
+            gc.set_threshold(*self.default_threshold)
+        if scene_name in self.collecting_scenes:
+            self.pending = ("scene change", 2)
+
+    def safe_point(self, reason: str = "level switch"):
+        """ A moment in the middle of a scene where garbage is left, like switching levels
+
+        Only the young generations are collected, and not before the end of the frame.
+        """
+        if self.managed and self.pending is None:
+            self.pending = (reason, 1)
+
+    def end_of_frame(self):
+        """ Called by the game after every frame, runs the collection asked for during it"""
+        if self.pending is not None:
+            (reason, generation), self.pending = self.pending, None
+            self.collect(reason, generation)
+
+    def summary(self, frame_ms: float = 1000 / 60) -> dict:
+        pauses = list(self.pauses)
+        # these run between scenes, not during a gameplay frame
+        gameplay = [pause for pause in pauses
+                    if pause.scene == "gameplay" and pause.reason not in ("scene change", "freeze", "release")]
+        automatic = [pause for pause in gameplay if pause.reason == "automatic"]
+        return dict(
+            mode="managed" if self.managed else "unmanaged",
+            collections=len(pauses),
+            total_ms=round(sum(pause.ms for pause in pauses), 3),
+            longest_ms=round(max((pause.ms for pause in pauses), default=0.0), 3),
+            gameplay_collections=len(gameplay),
+            gameplay_automatic=len(automatic),
+            gameplay_longest_ms=round(max((pause.ms for pause in gameplay), default=0.0), 3),
+            # collections during gameplay that alone take longer than a frame
+            gameplay_over_budget=sum(pause.ms > frame_ms for pause in gameplay),
+        )
+
+    def export(self, path: str):
+        """ Write every recorded pause as CSV"""
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(GcPause._fields)
+            writer.writerows(self.pauses)
+
+
+# garbage collection is one per process, so is its policy
+gc_policy = GcPolicy()
@@ -0,0 +1,181 @@
+import random
+import time
+import numpy as np
+import pygame
+
+from scripts.Game import Game
+from scripts.Fonts import fonts
+from scripts.GarbageCollector import gc_policy
+from scripts.Input import KeyState
+
+
+class Autopilot:
+    """ Input source that plays the gameplay scene on its own, used when there is no keyboard"""
+    def __init__(self):
+        self.game_instance = None
+        # how close (in px) an enemy projectile has to get before the player tries to dodge it
+        self.dodge_distance = 150
+
+    def get_events(self):
+        scene = self.game_instance.current_scene
+        if self.game_instance.current_scene_name != "gameplay" or not scene.is_active:
+            return []
+
+        # every level starts with a new player that is not shooting yet
+        if not scene.game_objects["player"].is_shooting:
+            return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)]
+        return []
+
+    def get_pressed(self):
+        scene = self.game_instance.current_scene
+        if self.game_instance.current_scene_name != "gameplay" or not scene.is_active:
+            return KeyState()
+
+        player = scene.game_objects["player"]
+        player_x = player.rect.centerx
+
+        # dodge enemy projectiles first
+        if not player.invincibility:
+            position, size = scene.game_objects["boss_projectiles"].bounds()
+            for projectile in map(pygame.Rect, position.tolist(), size.tolist()):
+                distance = player.rect.top - projectile.bottom
+                if 0 <= distance < self.dodge_distance and abs(projectile.centerx - player_x) < player.rect.width:
+                    if projectile.centerx > player_x or player.rect.left < player.rect.width:
+                        return KeyState([pygame.K_a]) if player.rect.left > 0 else KeyState([pygame.K_d])
+                    return KeyState([pygame.K_d])
+
+        # then chase the enemy closest to the bottom of the screen, the leftmost one of those as low
+        enemies = scene.game_objects["enemies"]
+        if not enemies:
+            return KeyState()
+        position, size = enemies.bounds()
+        bottom = position[:, 1] + size[:, 1]
+        lowest = np.flatnonzero(bottom == bottom.max())
+        i = lowest[np.argmin(position[lowest, 0])].item()
+        target, target_rect = enemies[i], pygame.Rect(position[i].tolist(), size[i].tolist())
+        # aim where the target will be once the projectile gets there
+        travel_time = (player.rect.top - target_rect.bottom) / player.projectile_speed
+        speed_x = target.speed[0] if isinstance(target.speed, tuple) else target.speed
+        target_x = target_rect.centerx + speed_x * travel_time
+        target_x = min(max(target_rect.width / 2, target_x), self.game_instance.width - target_rect.width / 2)
+        if target_x < player_x - 5:
+            return KeyState([pygame.K_a])
+        elif target_x > player_x + 5:
+            return KeyState([pygame.K_d])
+        return KeyState()
+
+
+class RandomInput(Autopilot):
+    """ Input source that always shoots and holds random movement keys for a random number of ticks
+
+    It has a random generator of its own, so the same seed always plays the same way without taking numbers
+    from the game's.
+    """
+    moves = ((), (pygame.K_a,), (pygame.K_d,), (pygame.K_w,), (pygame.K_s,), (pygame.K_a, pygame.K_w),
+             (pygame.K_d, pygame.K_w), (pygame.K_a, pygame.K_s), (pygame.K_d, pygame.K_s))
+
+    def __init__(self, seed: int = None, min_hold: int = 5, max_hold: int = 40):
+        super().__init__()
+        self.random = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.keys = KeyState()
+        self.hold = 0
+
+    def get_pressed(self):
+        if self.hold == 0:
+            self.keys = KeyState(self.random.choice(self.moves))
+            self.hold = self.random.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.keys
+
+
+# input sources a headless game can be played with
+policies = ("autopilot", "random")
+
+
+def make_policy(name: str, seed: int = None):
+    if name == "random":
+        return RandomInput(seed)
+    return Autopilot()
+
+
+def run_headless(max_ticks: int = 100000, seed: int = None, recorder=None, profile_path: str = None,
+                 policy: str = "autopilot") -> dict:
+    """ Play one game as fast as possible without a window and return a summary of the run
+
+    A scripts.Replay.InputRecorder passed as recorder wraps the input policy and records the game. With a
+    profile_path every tick is profiled and exported there.
+    """
+    source = make_policy(policy, seed)
+    game = Game(headless=True, input_source=source if recorder is None else recorder, seed=seed)
+    source.game_instance = game
+    if recorder is not None:
+        recorder.source = source
+        recorder.game_instance = game
+        game.recorder = recorder
+    if profile_path is not None:
+        game.profiler.start()
+    game.load_scene("gameplay")
+    gameplay = game.current_scene
+    gameplay_seed = gameplay.seed
+
+    ticks = 0
+    level = gameplay.current_level
+    start = time.perf_counter()
+    while game.is_running and game.current_scene_name == "gameplay" and ticks < max_ticks:
+        level = gameplay.current_level
+        game.run()
+        ticks += 1
+    elapsed = time.perf_counter() - start
+
+    if game.current_scene_name == "gameplay":
+        score = gameplay.score
+        cause = "tick limit"
+        if recorder is not None:
+            recorder.finish()
+    else:
+        score = game.end_score
+        cause = game.end_cause if game.current_scene_name == "endscreen" else "won"
+
+    profile = None
+    if profile_path is not None:
+        game.profiler.export(profile_path)
+        profile = game.profiler.summary()
+    pools = {name: pool.stats() for name, pool in gameplay.pools.items()}
+    game.close()
+
+    return dict(
+        profile=profile,
+        seed=gameplay_seed,
+        ticks=ticks,
+        seconds=elapsed,
+        ticks_per_second=ticks / elapsed if elapsed > 0 else 0.0,
+        level=level,
+        score=score,
+        result=game.current_scene_name,
+        cause=cause,
+        pools=pools,
+        fonts=fonts.stats(),
+        gc=gc_policy.summary(),
+    )
+
+
+def print_report(report: dict):
+    print("game seed:        ", report["seed"])
+    print("ticks:            ", report["ticks"])
+    print("time:              {:.3f} s".format(report["seconds"]))
+    print("ticks per second:  {:.0f}".format(report["ticks_per_second"]))
+    print("level reached:    ", report["level"])
+    print("score:            ", report["score"])
+    print("finished on:      ", report["result"])
+    print("cause:            ", report["cause"])
+    for name, stats in report["pools"].items():
+        print("{} pool: ".format(name) + ", ".join("{} {}".format(key, value) for key, value in stats.items()))
+    print("fonts: " + ", ".join("{} {}".format(key, value) for key, value in report["fonts"].items()))
+    print("gc: " + ", ".join("{} {}".format(key, value) for key, value in report["gc"].items()))
+    if report["profile"] is not None:
+        print("mean per tick:")
+        for key, value in report["profile"].items():
+            if key.startswith("ms "):
+                print("  {:<24} {:.4f} ms".format(key[3:], value))
@@ -0,0 +1,104 @@
+import pygame
+
+from scripts.Assets import display_ready
+from scripts.Text import text_cache, blit_glyphs
+
+
+def alpha_surface(size: (int, int)) -> pygame.Surface:
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    return surface.convert_alpha() if display_ready() else surface
+
+
+class DurationBar:
+    """ White frame whose hollow part shrinks with the time left, redrawn only when that part changes width"""
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.surface = alpha_surface((width, height))
+        self.fill_width = None
+
+    def update(self, percent_left: float) -> pygame.Surface:
+        fill_width = int(self.width * percent_left - 2)
+        if fill_width != self.fill_width:
+            self.fill_width = fill_width
+            self.surface.fill((255, 255, 255, 255))
+            self.surface.fill((0, 0, 0, 0), pygame.Rect(1, 1, fill_width, self.height - 2))
+        return self.surface
+
+
+class HealthBar:
+    """ Bar going from green to red as health drops, redrawn only when the filled part changes width"""
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.surface = alpha_surface((width, height))
+        self.fill_width = None
+
+    def update(self, percent: float) -> pygame.Surface:
+        fill_width = int(self.width * percent - 2)
+        if fill_width == self.fill_width:
+            return self.surface
+        self.fill_width = fill_width
+
+        # no idea why, sometimes hue was value not in [0, 120]
+        hue = min(max(0, 120 * percent), 120)
+        color = pygame.Color("black")
+        color.hsla = (hue, 100, 50, 100)
+        self.surface.fill(color)
+        self.surface.fill((0, 0, 0), pygame.Rect(1, 1, self.width - 2, self.height - 2))
+        self.surface.fill(color, pygame.Rect(1, 1, fill_width, self.height - 2))
+        return self.surface
+
+
+class Hud:
+    """ Score, active powerups and boss hp drawn over the gameplay
+
+    Bar surfaces are allocated once and kept for the whole game, a frame only blits them.
+    """
+    x = 20
+    y = 20
+    item_bottom_padding = 10
+    duration_bar_width = 100
+    boss_hp_bar_width = 300
+    boss_hp_bar_height = 10
+    boss_hp_bar_y = 10
+
+    def __init__(self, game_instance):
+        self.game_instance = game_instance
+        # one bar per powerup type, a type is never active twice at the same time
+        self.duration_bars = dict()
+        self.boss_hp_bar = None
+
+    def duration_bar(self, powerup_type, height: int) -> DurationBar:
+        bar = self.duration_bars.get(powerup_type)
+        if bar is None or bar.height != height:
+            bar = self.duration_bars[powerup_type] = DurationBar(self.duration_bar_width, height)
+        return bar
+
+    def draw(self, scene_instance):
+        screen = self.game_instance.screen
+        x, y = self.x, self.y
+
+        # Score label
+        screen.blit(scene_instance.score_label, (x, y))
+        # the score changes all the time, it is put together from cached digits
+        digits = text_cache.glyphs(scene_instance.font, str(scene_instance.score), (255, 255, 255))
+        number_rect = blit_glyphs(screen, digits, (x + scene_instance.score_label.get_width(), y))
+        y += number_rect.height + self.item_bottom_padding
+
+        # Active powerups list
+        for powerup in scene_instance.game_objects["player"].active_powerups:
+            icon = scene_instance.images[powerup.type.value]
+            icon_width, icon_height = icon.get_size()
+            screen.blit(icon, (x, y))
+            bar = self.duration_bar(powerup.type, icon_height)
+            screen.blit(bar.update(powerup.duration / powerup.start_duration), (x + icon_width + 10, y))
+            y += icon_height + self.item_bottom_padding
+
+        # Boss hp bar if on 5th level
+        if scene_instance.current_level == 5:
+            boss = scene_instance.game_objects["boss"]
+            if self.boss_hp_bar is None:
+                self.boss_hp_bar = HealthBar(self.boss_hp_bar_width, self.boss_hp_bar_height)
+            surface = self.boss_hp_bar.update(boss.health_points / boss.max_hp)
+            screen.blit(surface, ((self.game_instance.width - self.boss_hp_bar_width) / 2, self.boss_hp_bar_y))
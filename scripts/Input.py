@@ -0,0 +1,19 @@
+import pygame
+
+
+class KeyState:
+    """ Set of pressed keys that can be indexed the same way as pygame.key.get_pressed()"""
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class KeyboardInput:
+    """ Live input from the keyboard, polled from pygame once per tick"""
+    def get_events(self):
+        return pygame.event.get()
+
+    def get_pressed(self):
+        return pygame.key.get_pressed()
@@ -0,0 +1,266 @@
+""" Levels are JSON files in assets/levels:
+
+    {
+      "version": 1,
+      "kill_score": 150,
+      "special_kill_score": 750,
+      "rows": [
+        {"y": 0, "x": {"from": 100, "to": 700, "step": 60}, "enemy": "enemy2", "health_points": 3,
+         "score_multiplier": 3, "speed": [-2, 0]},
+        {"y": 400, "x": [370], "enemy": "enemy_special", "score": "special", "powerup": "power",
+         "replace": [{"x": 370, "health_points": 3}]}
+      ],
+      "boss": false
+    }
+
+Every row spawns one enemy at each x, in order. "replace" changes single enemies of the row, any key of the row but
+y, x and replace can be given there. Enemies are worth int(kill_score) or int(special_kill_score), depending on
+"score", times "score_multiplier". The boss, if any, is spawned after all rows.
+"""
+
+import glob
+import json
+import os
+import zlib
+import numpy as np
+
+from scripts.Assets import asset_path, cache_path, cache
+from scripts.GameplayObjects import Enemy, Powerup, PowerupType, Boss
+
+format_version = 1
+enemy_sprites = ("enemy", "enemy2", "enemy3", "enemy_special")
+powerup_names = tuple(powerup_type.value[len("powerup_"):] for powerup_type in PowerupType)
+# row keys and their defaults, the same as Enemy's
+enemy_defaults = dict(enemy="enemy", health_points=1, speed=(2, 0), score="kill", score_multiplier=1, powerup=None)
+
+
+class LevelFormatError(ValueError):
+    pass
+
+
+class SpawnTable:
+    """ Level compiled to one record per enemy, sprites and powerups are indices into the name tuples"""
+    # powerup is -1 for enemies without one
+    record = np.dtype([("position", np.int32, (2,)), ("velocity", np.float64, (2,)), ("health_points", np.int32),
+                       ("score_value", np.int64), ("sprite", np.int8), ("powerup", np.int8)])
+
+    def __init__(self, records: np.ndarray, kill_score: float, special_kill_score: float, boss: bool,
+                 sprites: tuple, powerups: tuple):
+        self.records = records
+        self.kill_score = kill_score
+        self.special_kill_score = special_kill_score
+        self.boss = boss
+        self.sprites = sprites
+        self.powerups = powerups
+
+    def __len__(self):
+        return len(self.records)
+
+    def save(self, path: str, source: tuple):
+        """ Write the table as one line of JSON followed by the raw records"""
+        header = dict(source=list(source), count=len(self.records), kill_score=self.kill_score,
+                      special_kill_score=self.special_kill_score, boss=self.boss, sprites=list(self.sprites),
+                      powerups=list(self.powerups))
+        # written next to the target first, a half written cache file must never be read
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            file.write(self.records.tobytes())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def read(cls, path: str, source: tuple):
+        """ Table saved by save(), None if there is none or it was compiled from a different source"""
+        try:
+            with open(path, "rb") as file:
+                header = json.loads(file.readline())
+                if tuple(header["source"]) != source:
+                    return None
+                records = np.frombuffer(file.read(), cls.record, header["count"])
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(records, header["kill_score"], header["special_kill_score"], header["boss"],
+                   tuple(header["sprites"]), tuple(header["powerups"]))
+
+    def instantiate(self, scene_instance, images: dict, game_objects: dict):
+        """ Create every enemy of the level and add them to the enemies store at once"""
+        for _ in self.instantiate_steps(scene_instance, images, game_objects):
+            pass
+
+    def instantiate_steps(self, scene_instance, images: dict, game_objects: dict, batch: int = 8):
+        """ instantiate() as a generator, stopping after every batch of enemies created"""
+        sprites = [images[name] for name in self.sprites]
+        powerup_types = [PowerupType("powerup_" + name) for name in self.powerups]
+        enemies = []
+        records = self.records
+        for (x, y), health_points, score_value, sprite, powerup in zip(
+                records["position"].tolist(), records["health_points"].tolist(), records["score_value"].tolist(),
+                records["sprite"].tolist(), records["powerup"].tolist()):
+            if powerup >= 0:
+                powerup_type = powerup_types[powerup]
+                powerup = Powerup(scene_instance, images[powerup_type.value], powerup_type)
+            else:
+                powerup = None
+            enemies.append(Enemy(scene_instance, sprites[sprite], (x, y), health_points, powerup, score_value))
+            if len(enemies) % batch == 0:
+                yield
+
+        sizes = np.array([image.get_size() for image in sprites], np.int64).reshape(-1, 2)
+        game_objects["enemies"].extend(enemies, records["position"], sizes[records["sprite"]], records["velocity"],
+                                       records["health_points"])
+
+        if self.boss:
+            boss = Boss(scene_instance, images)
+            game_objects["enemies"].append(boss)
+            game_objects["boss"] = boss
+
+
+def check(condition: bool, where: str, message: str):
+    if not condition:
+        raise LevelFormatError("{}: {}".format(where, message))
+
+
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_keys(data: dict, allowed, where: str):
+    check(isinstance(data, dict), where, "must be an object")
+    unknown = sorted(set(data) - set(allowed))
+    check(not unknown, where, "unknown keys " + ", ".join(unknown))
+
+
+def check_enemy(data: dict, where: str):
+    if "enemy" in data:
+        check(data["enemy"] in enemy_sprites, where + ".enemy", "must be one of " + ", ".join(enemy_sprites))
+    if "health_points" in data:
+        check(is_int(data["health_points"]) and data["health_points"] > 0, where + ".health_points",
+              "must be a positive integer")
+    if "speed" in data:
+        speed = data["speed"]
+        check(isinstance(speed, list) and len(speed) == 2 and all(is_number(value) for value in speed),
+              where + ".speed", "must be a pair of numbers")
+    if "score" in data:
+        check(data["score"] in ("kill", "special"), where + ".score", "must be kill or special")
+    if "score_multiplier" in data:
+        check(is_int(data["score_multiplier"]) and data["score_multiplier"] >= 0, where + ".score_multiplier",
+              "must be a non-negative integer")
+    if "powerup" in data:
+        check(data["powerup"] is None or data["powerup"] in powerup_names, where + ".powerup",
+              "must be null or one of " + ", ".join(powerup_names))
+
+
+def row_columns(row: dict, where: str) -> list:
+    x = row["x"]
+    if isinstance(x, dict):
+        check_keys(x, ("from", "to", "step"), where + ".x")
+        check(all(is_int(x.get(key)) for key in ("from", "to", "step")), where + ".x",
+              "needs integer from, to and step")
+        check(x["step"] > 0, where + ".x.step", "must be positive")
+        # "to" is the last column, not one past it
+        return list(range(x["from"], x["to"] + 1, x["step"]))
+    check(isinstance(x, list) and all(is_int(value) for value in x), where + ".x",
+          "must be a list of integers or an object with from, to and step")
+    return x
+
+
+def validate(data: dict, name: str = "level"):
+    """ Raise LevelFormatError naming the first thing wrong with the level data"""
+    check_keys(data, ("version", "kill_score", "special_kill_score", "rows", "boss"), name)
+    check(data.get("version") == format_version, name + ".version", "must be {}".format(format_version))
+    for key in ("kill_score", "special_kill_score"):
+        check(is_number(data.get(key)) and data[key] >= 0, name + "." + key, "must be a non-negative number")
+    check(isinstance(data.get("boss", False), bool), name + ".boss", "must be true or false")
+    check(isinstance(data.get("rows"), list), name + ".rows", "must be a list")
+
+    for r, row in enumerate(data["rows"]):
+        where = "{}.rows[{}]".format(name, r)
+        check_keys(row, ("y", "x", "replace") + tuple(enemy_defaults), where)
+        check(is_int(row.get("y")), where + ".y", "must be an integer")
+        check("x" in row, where + ".x", "is missing")
+        columns = row_columns(row, where)
+        check_enemy(row, where)
+
+        replaced = set()
+        check(isinstance(row.get("replace", []), list), where + ".replace", "must be a list")
+        for i, replacement in enumerate(row.get("replace", [])):
+            replacement_where = "{}.replace[{}]".format(where, i)
+            check_keys(replacement, ("x",) + tuple(enemy_defaults), replacement_where)
+            check(replacement.get("x") in columns, replacement_where + ".x", "must be one of the row's columns")
+            check(replacement["x"] not in replaced, replacement_where + ".x", "is replaced twice")
+            replaced.add(replacement["x"])
+            check_enemy(replacement, replacement_where)
+
+
+def compile_level(data: dict, name: str = "level") -> SpawnTable:
+    """ Validate level data and turn it into a spawn table"""
+    validate(data, name)
+
+    sprites = []
+    powerups = []
+    rows = []
+    for row in data["rows"]:
+        replacements = {replacement["x"]: replacement for replacement in row.get("replace", [])}
+        for x in row_columns(row, name):
+            enemy = dict(enemy_defaults)
+            enemy.update((key, value) for key, value in row.items() if key in enemy_defaults)
+            enemy.update((key, value) for key, value in replacements.get(x, dict()).items() if key != "x")
+
+            if enemy["enemy"] not in sprites:
+                sprites.append(enemy["enemy"])
+            powerup = -1
+            if enemy["powerup"] is not None:
+                if enemy["powerup"] not in powerups:
+                    powerups.append(enemy["powerup"])
+                powerup = powerups.index(enemy["powerup"])
+            score = data["kill_score"] if enemy["score"] == "kill" else data["special_kill_score"]
+            rows.append(((x, row["y"]), enemy["speed"], enemy["health_points"],
+                         int(score) * enemy["score_multiplier"], sprites.index(enemy["enemy"]), powerup))
+
+    records = np.array(rows, SpawnTable.record)
+    return SpawnTable(records, float(data["kill_score"]), float(data["special_kill_score"]), data.get("boss", False),
+                      tuple(sprites), tuple(powerups))
+
+
+def load_level(relative_path: str) -> SpawnTable:
+    """ Spawn table of a level file, compiled once and then read from the disk cache while the file is unchanged
+
+    The disk cache goes by what the file holds, not by where it is, a packaged build unpacks its assets to a new
+    temporary directory on every launch. Every level has one cache file, compiling a changed level replaces it.
+    """
+    path = asset_path(relative_path)
+    stat = os.stat(path)
+
+    def load():
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as file:
+            content = file.read()
+        source = (format_version, zlib.crc32(content), len(content))
+        compiled_path = cache_path(os.path.join("levels", name + ".spawn"))
+        table = SpawnTable.read(compiled_path, source)
+        if table is not None:
+            return table
+
+        try:
+            data = json.loads(content.decode("utf-8"))
+        except json.JSONDecodeError as error:
+            raise LevelFormatError("{}: {}".format(relative_path, error))
+        table = compile_level(data, name)
+        try:
+            os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+            table.save(compiled_path, source)
+            # earlier versions named cache files after where the level was, one more for every checkout
+            for stale_path in glob.glob(cache_path(os.path.join("levels", name + "-*.spawn"))):
+                os.remove(stale_path)
+        except OSError:
+            # a read-only cache only means compiling again next time
+            pass
+        return table
+
+    # within one process the file's place does not change, its modification time is enough to notice an edit
+    return cache.get(("level", relative_path, stat.st_mtime_ns, stat.st_size), load,
+                     lambda table: table.records.nbytes)
@@ -1,176 +1,106 @@
-from scripts.GameplayObjects import Player, Enemy, Powerup, PowerupType, Boss
+from time import perf_counter
+
+from scripts.GameplayObjects import Player
+from scripts.EntityStore import ObjectList, EntityStore
+from scripts.LevelFormat import load_level
 
 
 class Level:
     def __init__(self):
         self.game_objects = {
             "player": None,
-            "enemies": [],
-            "player_projectiles": [],
-            "boss_projectiles": [],
-            "powerups": []
+            "enemies": EntityStore(),
+            "player_projectiles": EntityStore(),
+            "boss_projectiles": EntityStore(),
+            "powerups": ObjectList()
             # "blocks": [],
         }
         self.kill_score = 100
         self.special_kill_score = 500
         self.row_height = 100
 
-    def load(self, game_instance, images: dict):
-        self.game_objects["player"] = Player(game_instance, images["player"])
+    def load(self, scene_instance, images: dict) -> dict:
+        """ Create every object of the level at once"""
+        for _ in self.build(scene_instance, images):
+            pass
+        return self.game_objects
+
+    def build(self, scene_instance, images: dict):
+        """ Create the objects of the level a few at a time, one part every time the generator is advanced"""
+        self.game_objects["player"] = Player(scene_instance, images["player"])
+        yield
 
 
-class Level1(Level):
+class DataLevel(Level):
+    """ Level described by a file in assets/levels, see LevelFormat"""
+    path = None
+
     def __init__(self):
         super().__init__()
+        self.spawn_table = load_level(self.path)
+        self.kill_score = self.spawn_table.kill_score
+        self.special_kill_score = self.spawn_table.special_kill_score
 
-    def load(self, game_instance, images: dict) -> dict:
-        super().load(game_instance, images)
+    def build(self, scene_instance, images: dict):
+        yield from super().build(scene_instance, images)
+        yield from self.spawn_table.instantiate_steps(scene_instance, images, self.game_objects)
 
-        for r in range(2):
-            for i in range(100, 701, 60):
-                enemy = Enemy(game_instance, images["enemy"], (i, r * self.row_height), score_value=int(self.kill_score))
-                if r == 1:
-                    enemy.set_speed((-2, 0))
-                self.game_objects["enemies"].append(enemy)
 
-        return self.game_objects
+class Level1(DataLevel):
+    path = "assets/levels/level1.json"
 
 
-class Level2(Level):
-    def __init__(self):
-        super().__init__()
-        self.kill_score *= 1.5
-        self.special_kill_score *= 1.5
-
-    def load(self, game_instance, images: dict) -> dict:
-        super().load(game_instance, images)
-
-        for i in range(100, 701, 60):
-            self.game_objects["enemies"].append(
-                Enemy(game_instance, images["enemy2"], (i, 0), health_points=3, score_value=int(self.kill_score) * 3)
-            )
-        for r in range(1, 4):
-            for i in range(100, 701, 60):
-                enemy = Enemy(game_instance, images["enemy"], (i, r * self.row_height), score_value=int(self.kill_score))
-                if r in [1, 3]:
-                    enemy.set_speed((-2, 0))
-                self.game_objects["enemies"].append(enemy)
-        self.game_objects["enemies"].append(
-            Enemy(game_instance,
-                  images["enemy_special"],
-                  (370, 400),
-                  health_points=3,
-                  powerup=Powerup(game_instance, images["powerup_power"], PowerupType.POWER),
-                  score_value=int(self.special_kill_score))
-        )
+class Level2(DataLevel):
+    path = "assets/levels/level2.json"
 
-        return self.game_objects
 
+class Level3(DataLevel):
+    path = "assets/levels/level3.json"
 
-class Level3(Level):
-    def __init__(self):
-        super().__init__()
-        self.kill_score *= 4.5
-        self.special_kill_score *= 4.5
-
-    def load(self, game_instance, images: dict) -> dict:
-        super().load(game_instance, images)
-
-        for i in range(100, 701, 60):
-            self.game_objects["enemies"].append(
-                Enemy(game_instance, images["enemy3"], (i, 0), health_points=5, score_value=int(self.kill_score) * 5)
-            )
-        for i in range(100, 701, 60):
-            self.game_objects["enemies"].append(
-                Enemy(game_instance, images["enemy2"], (i, 100), health_points=3, score_value=int(self.kill_score) * 3)
-                .set_speed((-2, 0))
-            )
-        for r in range(2, 4):
-            for i in range(100, 701, 60):
-                enemy = Enemy(game_instance, images["enemy"], (i, r * self.row_height), score_value=int(self.kill_score))
-                if r == 3:
-                    enemy.set_speed((-2, 0))
-                self.game_objects["enemies"].append(enemy)
-        self.game_objects["enemies"].append(
-            Enemy(game_instance,
-                  images["enemy_special"],
-                  (470, 400),
-                  health_points=3,
-                  powerup=Powerup(game_instance, images["powerup_power"], PowerupType.POWER),
-                  score_value=int(self.special_kill_score))
-        )
-        self.game_objects["enemies"].append(
-            Enemy(game_instance,
-                  images["enemy_special"],
-                  (270, 400),
-                  health_points=3,
-                  powerup=Powerup(game_instance, images["powerup_speed"], PowerupType.SPEED),
-                  score_value=int(self.special_kill_score))
-        )
 
-        return self.game_objects
+class Level4(DataLevel):
+    path = "assets/levels/level4.json"
 
 
-class Level4(Level):
-    def __init__(self):
-        super().__init__()
-        self.kill_score *= 6
-        self.special_kill_score *= 6
-
-    def load(self, game_instance, images: dict) -> dict:
-        super().load(game_instance, images)
-
-        for r in range(0, 4):
-            for i in range(100, 701, 60):
-                if r < 2:
-                    enemy = Enemy(game_instance,
-                                  images["enemy3"],
-                                  (i, r * self.row_height),
-                                  health_points=5,
-                                  score_value=int(self.kill_score) * 5
-                                  )
-                    if r == 0:
-                        enemy.set_speed((-2, 0))
-                    self.game_objects["enemies"].append(enemy)
-                else:
-                    if r == 3 and i in [160, 340, 400, 640]:
-                        powerup = None
-                        if i in [160, 640]:
-                            powerup = Powerup(game_instance, images["powerup_speed"], PowerupType.SPEED)
-                        elif i == 340:
-                            powerup = Powerup(game_instance, images["powerup_power"], PowerupType.POWER)
-                        elif i == 400:
-                            powerup = Powerup(game_instance, images["powerup_ghost_bullets"], PowerupType.GHOST_BULLETS)
-                        self.game_objects["enemies"].append(
-                            Enemy(game_instance,
-                                  images["enemy_special"],
-                                  (i, r * self.row_height),
-                                  health_points=3,
-                                  powerup=powerup,
-                                  score_value=int(self.special_kill_score)
-                                  )
-                        )
-                    else:
-                        enemy = Enemy(game_instance, images["enemy"], (i, r * self.row_height),
-                                      score_value=int(self.kill_score))
-                        if r == 2:
-                            enemy.set_speed((-2, 0))
-                        self.game_objects["enemies"].append(enemy)
+class Level5(DataLevel):
+    path = "assets/levels/level5.json"
 
-        return self.game_objects
 
+# in the order they are played
+levels = (Level1, Level2, Level3, Level4, Level5)
 
-class Level5(Level):
-    def __init__(self):
-        super().__init__()
-        self.kill_score *= 10
-        self.special_kill_score *= 10
 
-    def load(self, game_instance, images: dict) -> dict:
-        super().load(game_instance, images)
+class LevelBuilder:
+    """ Builds a level during the ticks of the one before it, so switching to it is a single swap
+
+    Building draws no random numbers and touches nothing outside the new level, so a game plays the same no
+    matter how far the building got by the time the level is needed.
+    """
+    def __init__(self, level_type, scene_instance, images: dict):
+        self.game_objects = None
+        self.steps = self.build(level_type, scene_instance, images)
+
+    def build(self, level_type, scene_instance, images: dict):
+        # reading the level file is the first part
+        level = level_type()
+        yield
+        yield from level.build(scene_instance, images)
+        self.game_objects = level.game_objects
+
+    @property
+    def is_done(self) -> bool:
+        return self.game_objects is not None
 
-        boss = Boss(game_instance, images)
-        self.game_objects["enemies"].append(boss)
-        self.game_objects["boss"] = boss
+    def advance(self, budget: float) -> bool:
+        """ Build for about budget seconds (at least one part), True once the level is complete"""
+        deadline = perf_counter() + budget
+        for _ in self.steps:
+            if perf_counter() >= deadline:
+                break
+        return self.is_done
 
+    def finish(self) -> dict:
+        """ Game objects of the level, whatever is not built yet is built now"""
+        for _ in self.steps:
+            pass
         return self.game_objects
@@ -1,5 +1,8 @@
 import pygame
 
+from scripts.Text import text_cache
+from scripts.Fonts import get_font
+
 
 class Menu:
     class Item:
@@ -12,9 +15,9 @@ class Menu:
             self.background_color = background_color
 
         def get_surface(self):
-            surface = self.font.render(self.text, 1, self.text_color, self.background_color)
-            surface.set_colorkey(self.background_color)
-            return surface
+            # the background is keyed out, the cache sets that up once for every item drawn the same way
+            return text_cache.render(self.font, self.text, self.text_color, self.background_color,
+                                     colorkey=self.background_color)
 
     def __init__(self, game_instance, title: str):
         self.game_instance = game_instance
@@ -27,8 +30,8 @@ class Menu:
         self.item_bottom_padding = 20
         self.item_font_size = 34
 
-        self.title_font = pygame.font.SysFont("monospace", 64)
-        self.item_font = pygame.font.SysFont("monospace", self.item_font_size)
+        self.title_font = get_font("monospace", 64)
+        self.item_font = get_font("monospace", self.item_font_size)
 
     def add_item(self, item_string: str, scene_name: str, text_color=(255, 255, 255), background_color=(0, 0, 0)):
         new_item = self.Item(item_string, scene_name, self.item_font, text_color, background_color)
@@ -62,7 +65,7 @@ class Menu:
             self.set_active_item(self.items[current_active_index - 1])
 
     def draw(self):
-        title_surface = self.title_font.render(self.title, 1, (255, 255, 255), (0, 0, 0))
+        title_surface = text_cache.render(self.title_font, self.title, (255, 255, 255), (0, 0, 0))
         y = self.top_padding
         x = (self.game_instance.width - title_surface.get_rect().width) / 2
         self.game_instance.screen.blit(title_surface, (x, y))
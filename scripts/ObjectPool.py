@@ -0,0 +1,51 @@
+class ObjectPool:
+    """ Recycles game objects of one kind instead of allocating a new one for every spawn
+
+    Pooled objects must implement spawn(), taking the same arguments as their constructor after scene_instance.
+    They come back to the pool when the EntityStore they were added to removes them.
+    """
+    def __init__(self, kind: type, scene_instance, capacity: int = 256):
+        self.kind = kind
+        self.scene_instance = scene_instance
+        # at most this many dead objects are kept for reuse, the rest is left to the garbage collector
+        self.capacity = capacity
+        self.free = []
+
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+        self.in_use = 0
+        self.high_water_mark = 0
+
+    def spawn(self, *args):
+        if self.free:
+            game_object = self.free.pop()
+            game_object.spawn(*args)
+            self.reused += 1
+        else:
+            game_object = self.kind(self.scene_instance, *args)
+            game_object.pool = self
+            self.created += 1
+
+        self.in_use += 1
+        if self.in_use > self.high_water_mark:
+            self.high_water_mark = self.in_use
+        return game_object
+
+    def release(self, game_object):
+        self.in_use -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(game_object)
+        else:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return dict(
+            capacity=self.capacity,
+            created=self.created,
+            reused=self.reused,
+            dropped=self.dropped,
+            in_use=self.in_use,
+            free=len(self.free),
+            high_water_mark=self.high_water_mark,
+        )
@@ -0,0 +1,74 @@
+import threading
+
+
+class Preloader:
+    """ Prepares what a scene will need on a worker thread while another scene is shown
+
+    Every task is split in two. work runs on the worker and must not touch the display. finish gets what work
+    returned and runs on the main thread, which owns the display (pixel format conversion needs it). Finished
+    work is handed over under a lock, collect() runs the finish steps of whatever is done so far.
+    """
+    def __init__(self):
+        self.tasks = []
+        self.lock = threading.Lock()
+        # (name, finish, value) of work that is done but not collected yet
+        self.done = []
+        self.done_count = 0
+        self.failed = []
+        self.thread = None
+
+    def add(self, name: str, work, finish=None):
+        if self.thread is not None:
+            raise RuntimeError("tasks can only be added before the preloader is started")
+        self.tasks.append((name, work, finish))
+
+    def start(self):
+        if self.thread is not None or not self.tasks:
+            return
+        # a daemon, quitting from the menu never waits for it
+        self.thread = threading.Thread(target=self.run, name="preloader", daemon=True)
+        self.thread.start()
+
+    @property
+    def started(self) -> bool:
+        return self.thread is not None
+
+    def run(self):
+        for name, work, finish in self.tasks:
+            try:
+                value = work()
+            except Exception as error:
+                # the scene loads it the usual way later on, where the error shows up for real
+                with self.lock:
+                    self.failed.append((name, error))
+                    self.done_count += 1
+                continue
+            with self.lock:
+                self.done.append((name, finish, value))
+                self.done_count += 1
+
+    def progress(self) -> float:
+        """ Share of the tasks whose work is done, from 0 to 1"""
+        with self.lock:
+            return self.done_count / len(self.tasks) if self.tasks else 1.0
+
+    @property
+    def is_done(self) -> bool:
+        return self.progress() == 1.0
+
+    def collect(self, wait: bool = False, limit: int = None):
+        """ Run the finish step of tasks whose work is done, on the calling (main) thread
+
+        With wait the worker is waited for first, so everything is ready afterwards. limit is how many finish steps
+        to run at most, the rest are left for the next call.
+        """
+        if wait and self.thread is not None:
+            self.thread.join()
+        with self.lock:
+            if limit is None:
+                done, self.done = self.done, []
+            else:
+                done, self.done = self.done[:limit], self.done[limit:]
+        for name, finish, value in done:
+            if finish is not None:
+                finish(value)
@@ -0,0 +1,147 @@
+import csv
+import json
+import pygame
+
+from collections import deque
+from time import perf_counter
+
+from scripts.EntityStore import ObjectList
+from scripts.Fonts import get_font
+
+
+class Profiler:
+    """ Splits every frame into named phases, kept as a history that can be shown over the game or exported
+
+    Time always goes to the innermost phase entered, so entering "collision" from inside "update Projectile"
+    takes that time out of the projectile updates. Every method returns at once while the profiler is
+    disabled, and switching it on or off only takes effect when the next frame begins.
+    """
+    def __init__(self, game_instance, history: int = 36000):
+        self.game_instance = game_instance
+        self.enabled = False
+        self.requested = False
+        # set by start(), profiling then goes on with the overlay hidden
+        self.keep_running = False
+        self.overlay = False
+        self.frames = deque(maxlen=history)
+        self.frame = 0
+
+        self.phases = dict()
+        self.stack = []
+        self.last = 0.0
+        self.frame_start = 0.0
+        self.frame_steps = 0
+
+        # the overlay text is rendered again only every overlay_interval frames
+        self.overlay_interval = 30
+        self.overlay_lines = []
+        self.font = None
+
+    def start(self):
+        self.keep_running = True
+        self.requested = True
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.requested = self.overlay or self.keep_running
+
+    def begin_frame(self):
+        if self.requested != self.enabled:
+            self.enabled = self.requested
+        if not self.enabled:
+            return
+        self.phases = dict()
+        self.stack = ["other"]
+        self.last = self.frame_start = perf_counter()
+        self.frame_steps = self.game_instance.steps
+
+    def enter(self, name: str):
+        if not self.enabled:
+            return
+        now = perf_counter()
+        phase = self.stack[-1]
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+        self.stack.append(name)
+
+    def leave(self):
+        if not self.enabled:
+            return
+        now = perf_counter()
+        phase = self.stack.pop()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = perf_counter()
+        self.phases["other"] = self.phases.get("other", 0.0) + now - self.last
+
+        record = dict(frame=self.frame, steps=self.game_instance.steps - self.frame_steps,
+                      total_ms=(now - self.frame_start) * 1000)
+        for phase, seconds in self.phases.items():
+            record["ms " + phase] = seconds * 1000
+        for name, count in self.entity_counts().items():
+            record["count " + name] = count
+        self.frames.append(record)
+        self.frame += 1
+
+    def entity_counts(self) -> dict:
+        game_objects = getattr(self.game_instance.current_scene, "game_objects", None)
+        if not game_objects:
+            return dict()
+        counts = dict()
+        for name, value in game_objects.items():
+            counts[name] = len(value) if isinstance(value, ObjectList) else int(value is not None)
+        if game_objects.get("player") is not None:
+            counts["active_powerups"] = len(game_objects["player"].active_powerups)
+        return counts
+
+    def summary(self, frames: int = None) -> dict:
+        """ Mean of every value over the last frames (all kept frames by default)"""
+        records = list(self.frames)[-frames:] if frames else list(self.frames)
+        totals = dict()
+        for record in records:
+            for key, value in record.items():
+                if key != "frame":
+                    totals[key] = totals.get(key, 0) + value
+        return {key: value / len(records) for key, value in totals.items()}
+
+    def draw_overlay(self, screen: pygame.Surface):
+        if not self.overlay or not self.enabled:
+            return
+        self.enter("profiler")
+        if self.font is None:
+            self.font = get_font("monospace", 14)
+        if self.frame % self.overlay_interval == 0 or not self.overlay_lines:
+            summary = self.summary(60)
+            lines = ["frame {:6.2f} ms  steps {:.1f}".format(summary.get("total_ms", 0), summary.get("steps", 0))]
+            lines += ["{:<20}{:6.2f} ms".format(key[3:], value)
+                      for key, value in sorted(summary.items()) if key.startswith("ms ")]
+            lines += ["{:<20}{:6.0f}".format(key[6:], value)
+                      for key, value in summary.items() if key.startswith("count ")]
+            self.overlay_lines = [self.font.render(line, 1, (255, 255, 0), (0, 0, 0)) for line in lines]
+
+        y = 5
+        for line in self.overlay_lines:
+            screen.blit(line, (self.game_instance.width - line.get_width() - 5, y))
+            y += line.get_height()
+        self.leave()
+
+    def export(self, path: str):
+        """ Save the kept frames as JSON if the path ends with .json, as CSV otherwise"""
+        records = list(self.frames)
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump(records, file)
+            return
+
+        fields = dict()
+        for record in records:
+            for key in record:
+                fields[key] = None
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(fields), restval=0)
+            writer.writeheader()
+            writer.writerows(records)
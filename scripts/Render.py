@@ -0,0 +1,74 @@
+import pygame
+
+
+class DirtyScreen:
+    """ Display surface wrapper remembering which areas were drawn on, so only those are erased and pushed
+
+    Everything but blit, blits and fill is passed to the wrapped surface. A frame starts with clear(), which
+    erases what the previous frame drew, and ends with present(), which updates the erased and the newly
+    drawn areas, or the whole display once they cover more than max_dirty_ratio of it.
+    """
+    def __init__(self, surface: pygame.Surface, background=(0, 0, 0), max_dirty_ratio: float = 0.5):
+        self.surface = surface
+        self.background = background
+        self.max_dirty_area = max_dirty_ratio * surface.get_width() * surface.get_height()
+        self.drawn = []
+        self.erased = []
+        # the first frame has nothing to erase but the whole display is still undefined
+        self.full_update = True
+
+        self.frames = 0
+        self.full_updates = 0
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+    def blit(self, source: pygame.Surface, dest, area=None, special_flags: int = 0) -> pygame.Rect:
+        rect = self.surface.blit(source, dest, area, special_flags)
+        self.drawn.append(rect)
+        return rect
+
+    def blits(self, blit_sequence, doreturn: bool = True):
+        rects = self.surface.blits(blit_sequence, True)
+        self.drawn.extend(rects)
+        return rects if doreturn else None
+
+    def fill(self, color, rect=None, special_flags: int = 0) -> pygame.Rect:
+        rect = self.surface.fill(color, rect, special_flags)
+        self.drawn.append(rect)
+        return rect
+
+    def mark(self, rects: list):
+        """ Record areas drawn on straight through the wrapped surface's pixels"""
+        self.drawn.extend(rects)
+
+    def invalidate(self):
+        """ Push the whole display on the next present(), e.g. after something drew past this wrapper"""
+        self.full_update = True
+
+    def clear(self):
+        fill = self.surface.fill
+        for rect in self.drawn:
+            fill(self.background, rect)
+        self.erased = self.drawn
+        self.drawn = []
+
+    def present(self):
+        self.frames += 1
+        dirty = self.erased + self.drawn
+        if not self.full_update:
+            area = 0
+            for rect in dirty:
+                area += rect.width * rect.height
+            # overlapping rects are counted twice, which only makes the fallback a bit eager
+            self.full_update = area > self.max_dirty_area
+
+        if self.full_update:
+            self.full_updates += 1
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        self.full_update = False
+
+    def stats(self) -> dict:
+        return dict(frames=self.frames, full_updates=self.full_updates)
@@ -0,0 +1,215 @@
+import json
+import time
+import zlib
+import pygame
+
+from scripts.Game import Game
+from scripts.Input import KeyState
+
+
+# keys read by Player.handle_input, the rest of the keyboard state is not recorded
+watched_keys = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_v)
+recorded_events = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP)
+
+
+class DesyncError(Exception):
+    pass
+
+
+def state_hash(scene_instance) -> int:
+    """ Checksum of everything a tick of the gameplay scene can change"""
+    game_objects = scene_instance.game_objects
+    player = game_objects["player"]
+    state = [scene_instance.current_level, scene_instance.score, tuple(player.rect),
+             player.current_speed["x"], player.current_speed["y"], player.is_shooting,
+             [(powerup.type.value, powerup.duration) for powerup in player.active_powerups],
+             [tuple(powerup.rect) for powerup in game_objects["powerups"]]]
+    if "boss" in game_objects:
+        state.append((tuple(game_objects["boss"].rect), game_objects["boss"].health_points))
+    checksum = zlib.crc32(repr(state).encode())
+
+    for name in ("enemies", "player_projectiles", "boss_projectiles"):
+        store = game_objects[name]
+        n = len(store)
+        checksum = zlib.crc32(store.position[:n].tobytes(), checksum)
+        checksum = zlib.crc32(store.health_points[:n].tobytes(), checksum)
+    return checksum
+
+
+class Recording:
+    """ One game: its seed, the input it got and the state hash after every tick
+
+    Events are stored as [tick, type, key], keyboard state only when it changes as [tick, [keys]]. Games that
+    were still being played when the recording stopped are not 'ended', their replay stops after the same ticks.
+    """
+    def __init__(self, seed: int, events: list = None, keys: list = None, hashes: list = None,
+                 ticks: int = None, score: int = None, ended: bool = False):
+        self.seed = seed
+        self.events = events if events is not None else []
+        self.keys = keys if keys is not None else []
+        self.hashes = hashes if hashes is not None else []
+        self.ticks = ticks
+        self.score = score
+        self.ended = ended
+
+    def to_dict(self) -> dict:
+        return dict(seed=self.seed, ticks=self.ticks, score=self.score, ended=self.ended,
+                    events=self.events, keys=self.keys, hashes=self.hashes)
+
+
+def save_recordings(path: str, recordings: list):
+    with open(path, "w") as file:
+        json.dump(dict(version=1, games=[recording.to_dict() for recording in recordings]), file,
+                  separators=(",", ":"))
+
+
+def load_recordings(path: str) -> list:
+    with open(path) as file:
+        data = json.load(file)
+    return [Recording(**game) for game in data["games"]]
+
+
+class InputRecorder:
+    """ Input source passing another one through, recording every game played with it
+
+    Set it as game_instance.recorder too, the game reports handled events and finished ticks to it.
+    """
+    def __init__(self, source, game_instance=None):
+        self.source = source
+        self.game_instance = game_instance
+        self.recording = None
+        self.recordings = []
+        self.start_step = 0
+        self.pressed = None
+
+    @property
+    def tick(self) -> int:
+        return self.game_instance.steps - self.start_step
+
+    def get_events(self):
+        return self.source.get_events()
+
+    def get_pressed(self):
+        pressed = self.source.get_pressed()
+        if self.recording is not None:
+            keys = [key for key in watched_keys if pressed[key]]
+            if keys != self.pressed:
+                self.recording.keys.append([self.tick, keys])
+                self.pressed = keys
+        return pressed
+
+    def on_event(self, event):
+        if self.recording is not None and event.type in recorded_events:
+            self.recording.events.append([self.tick, event.type, getattr(event, "key", 0)])
+
+    def on_step(self):
+        if self.recording is not None:
+            self.recording.hashes.append(state_hash(self.game_instance.scenes["gameplay"]))
+
+    def start(self, seed: int):
+        self.recording = Recording(seed)
+        self.start_step = self.game_instance.steps
+        self.pressed = None
+
+    def stop(self, score: int, ended: bool = True):
+        if self.recording is None:
+            return
+        self.recording.ticks = self.tick
+        self.recording.score = score
+        self.recording.ended = ended
+        self.recordings.append(self.recording)
+        self.recording = None
+
+    def finish(self):
+        """ Stop a game that is still being played, e.g. when the window was closed during it"""
+        if self.recording is not None:
+            self.stop(self.game_instance.scenes["gameplay"].score, ended=False)
+
+
+class ReplayInput:
+    """ Input source feeding a recorded game back tick for tick, checking the state hash after each one"""
+    def __init__(self, recording: Recording, game_instance=None):
+        self.recording = recording
+        self.game_instance = game_instance
+        self.start_step = 0
+        self.next_event = 0
+        self.next_keys = 0
+        self.pressed = KeyState()
+        self.ticks = None
+        self.score = None
+        self.ended = False
+
+    @property
+    def tick(self) -> int:
+        return self.game_instance.steps - self.start_step
+
+    def get_events(self):
+        events = []
+        recorded = self.recording.events
+        while self.next_event < len(recorded) and recorded[self.next_event][0] <= self.tick:
+            _, event_type, key = recorded[self.next_event]
+            events.append(pygame.event.Event(event_type, key=key))
+            self.next_event += 1
+        return events
+
+    def get_pressed(self):
+        recorded = self.recording.keys
+        while self.next_keys < len(recorded) and recorded[self.next_keys][0] <= self.tick:
+            self.pressed = KeyState(recorded[self.next_keys][1])
+            self.next_keys += 1
+        return self.pressed
+
+    def on_event(self, event):
+        pass
+
+    def on_step(self):
+        if self.ticks is not None:
+            return
+        tick = self.tick - 1
+        hashes = self.recording.hashes
+        if tick >= len(hashes):
+            raise DesyncError("game still running after the {} recorded ticks".format(len(hashes)))
+        if state_hash(self.game_instance.scenes["gameplay"]) != hashes[tick]:
+            raise DesyncError("state differs from the recording after tick {}".format(tick))
+
+    def start(self, seed: int):
+        self.start_step = self.game_instance.steps
+
+    def stop(self, score: int, ended: bool = True):
+        if self.ticks is None:
+            self.ticks = self.tick
+            self.score = score
+            self.ended = ended
+
+
+def replay(recording: Recording) -> dict:
+    """ Play a recorded game again without a window as fast as possible, raises DesyncError if it goes differently"""
+    source = ReplayInput(recording)
+    game = Game(headless=True, input_source=source)
+    source.game_instance = game
+    game.recorder = source
+    gameplay = game.scenes["gameplay"]
+    gameplay.seed = recording.seed
+    game.load_scene("gameplay")
+
+    start = time.perf_counter()
+    while game.is_running and source.ticks is None:
+        if not recording.ended and source.tick == recording.ticks:
+            break
+        game.run()
+    elapsed = time.perf_counter() - start
+    # the recorded game may have been left without the scene being unloaded, e.g. by closing the window
+    source.stop(gameplay.score, ended=False)
+    game.close()
+
+    replayed = (source.ticks, source.score, source.ended)
+    if replayed != (recording.ticks, recording.score, recording.ended):
+        raise DesyncError("replay stopped after {} ticks with score {} (ended: {}), recording after {} ticks "
+                          "with score {} (ended: {})".format(*replayed, recording.ticks, recording.score,
+                                                             recording.ended))
+    return dict(
+        ticks=source.ticks,
+        seconds=elapsed,
+        ticks_per_second=source.ticks / elapsed if elapsed > 0 else 0.0,
+        score=source.score,
+    )
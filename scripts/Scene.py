@@ -1,28 +1,63 @@
-import os
-import sys
-import gc
 import pygame
 
-from random import randint, random
-
+from scripts.Assets import load_asset, load_atlas, decode_image, SpriteAtlas
 from scripts.Menu import Menu
+from scripts.Text import text_cache
+from scripts.Fonts import get_font
 from scripts.Levels import *
-from scripts.GameplayObjects import Particle
-
-
-def load_asset(relative_path: str, no_alpha: bool = False) -> pygame.Surface:
-    """ Get an asset, works for development and for packaged one-file executable"""
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-
-    abs_path = os.path.join(base_path, relative_path)
-
-    if no_alpha:
-        return pygame.image.load(abs_path).convert()
+from scripts.LevelFormat import load_level
+from scripts.GameplayObjects import Enemy, Projectile, BossProjectile
+from scripts.Collision import SpatialHash
+from scripts.EntityStore import EntityStore
+from scripts.ObjectPool import ObjectPool
+from scripts.Hud import Hud
+from scripts.Starfield import Starfield
+from scripts.GarbageCollector import gc_policy
+
+
+sprite_paths = {
+    "player":                    "assets/player_ship.png",
+    "enemy":                     "assets/alien_ship.png",
+    "enemy2":                    "assets/alien_ship2.png",
+    "enemy3":                    "assets/alien_ship3.png",
+    "enemy_special":             "assets/alien_ship_special.png",
+    "boss":                      "assets/boss_ship.png",
+    "projectile":                "assets/projectile.png",
+    "enemy_projectile":          "assets/enemy_projectile.png",
+    "enemy_projectile_directed": "assets/enemy_projectile_directed.png",
+    "enemy_projectile_spread":   "assets/enemy_projectile_spread.png",
+    "powerup_power":             "assets/powerup_power.png",
+    "powerup_speed":             "assets/powerup_speed.png",
+    "powerup_ghost_bullets":     "assets/powerup_ghost_bullets.png",
+    "powerup_invincibility":     "assets/powerup_invincibility.png",
+}
+
+
+def load_sprites(game_instance, names) -> dict:
+    """ Gameplay sprites by name, all cut from one atlas if the game uses it"""
+    if game_instance.sprite_atlas:
+        atlas = load_atlas(sprite_paths.values())
+        return {name: atlas[sprite_paths[name]] for name in names}
+    return {name: load_asset(sprite_paths[name]) for name in names}
+
+
+def preload_gameplay(game_instance):
+    """ Decode the gameplay sprites and read the first level on the preloader thread, once per game"""
+    preloader = game_instance.preloader
+    if preloader.started:
+        return
+    if game_instance.sprite_atlas:
+        paths = tuple(sprite_paths.values())
+        preloader.add("sprite atlas", lambda: SpriteAtlas.decode(paths), lambda decoded: load_atlas(paths, decoded))
     else:
-        return pygame.image.load(abs_path).convert_alpha()
+        for path in sprite_paths.values():
+            preloader.add(path, lambda path=path: decode_image(path),
+                          lambda decoded, path=path: load_asset(path, decoded=decoded))
+    preloader.add("shield", lambda: decode_image("assets/shield.png"),
+                  lambda decoded: load_asset("assets/shield.png", no_alpha=True, decoded=decoded))
+    # the spawn table is plain data, it lands in the asset cache with nothing left for the main thread
+    preloader.add("level 1", lambda: load_level(Level1.path))
+    preloader.start()
 
 
 class Scene:
@@ -38,7 +73,12 @@ class Scene:
     def handle_event(self, event):
         raise NotImplementedError()
 
-    def tick(self):
+    def update(self):
+        """ One fixed simulation step"""
+        pass
+
+    def draw(self, alpha: float = 1):
+        """ Draw the scene, alpha is how far the time being drawn is from the previous step to the last one"""
         raise NotImplementedError()
 
 
@@ -46,30 +86,19 @@ class MainMenuScene(Scene):
     def __init__(self, game_instance):
         super().__init__(game_instance)
         self.menu = None
-        self.particles = None
-        self.spawn_speed = 4
-        self.spawn_cooldown = 0
+        self.starfield = None
 
     def load(self):
         self.menu = Menu(self.game_instance, "Space Invaders")
         self.menu.add_item("Graj", "gameplay")
         self.menu.add_item("Pomoc", "help")
         self.menu.add_item("Wyjdź", "quit")
-        self.particles = list()
-
-        # 75 is the average count of particles on screen when spawned once every 5 frames, as they are now
-        for i in range(75):
-            Particle(
-                self.game_instance,
-                self.particles,
-                pos=(randint(0, self.game_instance.width), randint(0, self.game_instance.height)),
-                speed=random()*2+1
-            )
+        self.starfield = Starfield(self.game_instance)
+        preload_gameplay(self.game_instance)
 
     def unload(self):
         self.menu = None
-        self.particles = None
-        gc.collect()
+        self.starfield = None
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -80,17 +109,14 @@ class MainMenuScene(Scene):
             elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
                 self.menu.activate()
 
-    def tick(self):
-        if self.spawn_cooldown == 0:
-            Particle(self.game_instance, self.particles, speed=random() * 2 + 1)
-            self.spawn_cooldown = self.spawn_speed
-        else:
-            self.spawn_cooldown -= 1
+    def update(self):
+        # converting is left to the main thread, one task every tick instead of all of them on "Graj"
+        self.game_instance.preloader.collect(limit=1)
+        self.starfield.update()
 
+    def draw(self, alpha: float = 1):
         self.menu.draw()
-        for particle in self.particles:
-            particle.draw()
-            particle.update()
+        self.starfield.draw(alpha)
 
 
 class HelpScreenScene(Scene):
@@ -105,7 +131,7 @@ class HelpScreenScene(Scene):
         self.item_bottom_padding = 20
 
     def load(self):
-        self.font = pygame.font.SysFont("monospace", 16)
+        self.font = get_font("monospace", 16)
         self.text_color = (255, 255, 255)
         self.tip_surfaces = [
             self.font.render("Sterowanie statkiem: w/s/a/d", 1, self.text_color),
@@ -120,12 +146,10 @@ class HelpScreenScene(Scene):
             self.font.render("Passthrough Bullets - twoje pociski przenikają przez przeciwników", 1, self.text_color),
             self.font.render("Invincibiliy - zapewnia nietykalność na krótki czas", 1, self.text_color),
         ]
-        self.powerup_surfaces = [
-            load_asset("assets/powerup_power.png"),
-            load_asset("assets/powerup_speed.png"),
-            load_asset("assets/powerup_ghost_bullets.png"),
-            load_asset("assets/powerup_invincibility.png")
-        ]
+        self.powerup_surfaces = list(load_sprites(
+            self.game_instance,
+            ["powerup_power", "powerup_speed", "powerup_ghost_bullets", "powerup_invincibility"]
+        ).values())
 
     def unload(self):
         self.tip_surfaces = None
@@ -133,14 +157,13 @@ class HelpScreenScene(Scene):
         self.text_color = None
         self.powerup_surfaces = None
         self.powerup_descrtiptions_surfaces = None
-        gc.collect()
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_q:
                 self.game_instance.load_scene("menu")
 
-    def tick(self):
+    def draw(self, alpha: float = 1):
         x, y = self.screen_padding, self.screen_padding
 
         # print general tips list
@@ -164,48 +187,77 @@ class GameplayScene(Scene):
     def __init__(self, game_instance):
         super().__init__(game_instance)
         self.game_objects = None
+        self.broadphase = None
         self.images = None
         self.font = None
         self.score_label = None
         self.score = None
+        # projectiles are recycled for as long as the game runs
+        self.pools = dict(
+            player_projectiles=ObjectPool(Projectile, self),
+            boss_projectiles=ObjectPool(BossProjectile, self),
+        )
+        self.hud = Hud(game_instance)
 
         self.is_active = None
         self.current_level = None
+        # the level after the current one, built a little every tick while this one is played
+        self.level_builder = None
+        # time a tick may spend on it
+        self.prebuild_budget = 0.001
+        # seed of the current game, set it before loading to replay a recorded one
+        self.seed = None
 
     def load(self):
+        # every game gets a seed of its own, with the recorded input it is all that is needed to play it again
+        if self.seed is None:
+            self.seed = self.game_instance.random.getrandbits(32)
+        self.game_instance.random.seed(self.seed)
+        if self.game_instance.recorder is not None:
+            self.game_instance.recorder.start(self.seed)
+
         self.is_active = True
         self.current_level = 1
-        self.images = {
-            "player":                    load_asset("assets/player_ship.png"),
-            "enemy":                     load_asset("assets/alien_ship.png"),
-            "enemy2":                    load_asset("assets/alien_ship2.png"),
-            "enemy3":                    load_asset("assets/alien_ship3.png"),
-            "enemy_special":             load_asset("assets/alien_ship_special.png"),
-            "boss":                      load_asset("assets/boss_ship.png"),
-            "projectile":                load_asset("assets/projectile.png"),
-            "enemy_projectile":          load_asset("assets/enemy_projectile.png"),
-            "enemy_projectile_directed": load_asset("assets/enemy_projectile_directed.png"),
-            "enemy_projectile_spread":   load_asset("assets/enemy_projectile_spread.png"),
-            "powerup_power":             load_asset("assets/powerup_power.png"),
-            "powerup_speed":             load_asset("assets/powerup_speed.png"),
-            "powerup_ghost_bullets":     load_asset("assets/powerup_ghost_bullets.png"),
-            "powerup_invincibility":     load_asset("assets/powerup_invincibility.png"),
-            "player_shield":             load_asset("assets/shield.png", no_alpha=True)  # no per pixel alpha
-        }
-        self.game_objects = Level1().load(self.game_instance, self.images)
+        # sprites, fonts and the HUD stay loaded from one game to the next, playing again only resets the game
+        if self.images is None:
+            self.load_resources()
+        if self.level_builder is not None:
+            # the first level, built while the end screen was shown
+            self.game_objects = self.take_next_level()
+        else:
+            self.game_objects = Level1().load(self, self.images)
+        self.start_prebuild()
         self.score = 0
-        self.font = pygame.font.SysFont("monospace", 20)
+
+    def load_resources(self):
+        """ Everything a game needs that does not change while it is played"""
+        # whatever the preloader has not finished yet (nothing, unless "Graj" was picked right away)
+        self.game_instance.preloader.collect(wait=True)
+        self.images = load_sprites(self.game_instance, sprite_paths)
+        # no per pixel alpha, kept out of the atlas
+        self.images["player_shield"] = load_asset("assets/shield.png", no_alpha=True)
+        profiler = self.game_instance.profiler
+        self.broadphase = dict(
+            enemies=SpatialHash(profiler=profiler),
+            boss_projectiles=SpatialHash(profiler=profiler),
+            powerups=SpatialHash(profiler=profiler),
+        )
+        self.font = get_font("monospace", 20)
         self.score_label = self.font.render("Score: ", 1, (255, 255, 255))
 
     def unload(self):
+        if self.game_instance.recorder is not None:
+            self.game_instance.recorder.stop(self.score)
         self.is_active = False
+        self.seed = None
+        self.clear_level()
         self.game_objects = None
-        self.images = None
+        for grid in self.broadphase.values():
+            grid.rebuild([])
         self.score = None
-        self.font = None
-        self.score_label = None
         self.current_level = None
-        gc.collect()
+        # built a little every tick of the end screen, see prebuild(), playing again only has to swap it in
+        self.level_builder = LevelBuilder(levels[0], self, self.images)
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -222,85 +274,156 @@ class GameplayScene(Scene):
             pass
 
     # noinspection PyArgumentList
-    def tick(self):
+    def update(self):
+        # dying player unloads the scene mid tick, the rest of this tick still runs on these
+        player = self.game_objects["player"]
+        enemies = self.game_objects["enemies"]
+        player_projectiles = self.game_objects["player_projectiles"]
+        boss_projectiles = self.game_objects["boss_projectiles"]
+        powerups = list(self.game_objects["powerups"])
+        # objects spawned during this tick are appended at the end and only start moving on the next one
+        counts = [len(enemies), len(player_projectiles), len(boss_projectiles)]
+
+        if self.game_instance.draw_enabled:
+            player.snapshot()
+            for store in (enemies, player_projectiles, boss_projectiles):
+                store.snapshot()
+            for powerup in powerups:
+                powerup.snapshot()
+
         # call essential methods on every game object
-        for game_object in [self.game_objects["player"]] + \
-                            self.game_objects["enemies"] + \
-                            self.game_objects["player_projectiles"] + \
-                            self.game_objects["boss_projectiles"] + \
-                            self.game_objects["powerups"]:
-            game_object.draw()
-            game_object.update()
-            game_object.handle_input()
-
-        if not self.is_active:
-            return
+        profiler = self.game_instance.profiler
+        self.update_broadphase("enemies", "boss_projectiles", "powerups")
+        profiler.enter("update Player")
+        player.update()
+        player.handle_input()
+        profiler.leave()
+
+        self.update_store(enemies, Enemy, counts[0])
+        # enemies have moved, projectiles have to be tested against their new positions
+        if self.is_active:
+            self.update_broadphase("enemies")
+        self.update_store(player_projectiles, Projectile, counts[1])
+        self.update_store(boss_projectiles, BossProjectile, counts[2])
+
+        profiler.enter("update Powerup")
+        for powerup in powerups:
+            powerup.update()
+        profiler.leave()
+
+        # everything that died during this tick is removed at once
+        if self.is_active:
+            profiler.enter("cleanup")
+            for name in ("enemies", "player_projectiles", "boss_projectiles", "powerups"):
+                self.game_objects[name].compact()
+            player.active_powerups.compact()
+            self.check_for_end()
+            profiler.leave()
+
+        if self.is_active:
+            self.prebuild()
+
+    def draw(self, alpha: float = 1):
+        screen = self.game_instance.screen
+        self.game_objects["player"].draw(alpha)
+        for name in ("enemies", "player_projectiles", "boss_projectiles"):
+            self.game_objects[name].draw(screen, alpha=alpha)
+        for powerup in self.game_objects["powerups"]:
+            powerup.draw(alpha)
 
         # --- drawing ui ---
-        x = 20
-        y = 20
-        item_bottom_padding = 10
-        duration_bar_width = 100
-        boss_hp_bar_width = 300
-        boss_hp_bar_height = 10
-
-        # Score label
-        self.game_instance.screen.blit(self.score_label, (x, y))
-        number_label = self.font.render(str(self.score), 1, (255, 255, 255))
-        self.game_instance.screen.blit(number_label, (x + self.score_label.get_rect().width, y))
-        y += number_label.get_rect().height + item_bottom_padding
-
-        # Active powerups list
-        for powerup in self.game_objects["player"].active_powerups:
-            # draw icon
-            icon = self.images[powerup.type.value]
-            self.game_instance.screen.blit(icon, (x, y))
-            # draw duration bar
-            surface = pygame.Surface((duration_bar_width, icon.get_rect().height)).convert_alpha()
-            surface.fill((255, 255, 255, 255))
-            percent_left = powerup.duration / powerup.start_duration
-            surface.fill((0, 0, 0, 0), pygame.Rect(1, 1, duration_bar_width*percent_left-2, icon.get_rect().height-2))
-            self.game_instance.screen.blit(surface, (x + icon.get_rect().width + 10, y))
-
-            y += icon.get_rect().height + item_bottom_padding
-
-        # Boss hp bar if on 5th level
-        if self.current_level == 5:
-            hp_percent = self.game_objects["boss"].health_points / self.game_objects["boss"].max_hp
-
-            # no idea why, sometimes hue was value not in [0, 120]
-            hue = 120 * hp_percent
-            hue = min(max(0, hue), 120)
-
-            boss_hp_bar_color = pygame.Color("black")
-            boss_hp_bar_color.hsla = (hue, 100, 50, 100)
-            surface = pygame.Surface((boss_hp_bar_width, boss_hp_bar_height)).convert_alpha()
-            surface.fill(boss_hp_bar_color)
-            surface.fill(pygame.Color("black"), pygame.Rect(1, 1, boss_hp_bar_width - 2, boss_hp_bar_height - 2))
-            x = (self.game_instance.width - surface.get_rect().width) / 2
-            surface.fill(boss_hp_bar_color, pygame.Rect(1, 1, boss_hp_bar_width * hp_percent - 2, boss_hp_bar_height-2))
-            self.game_instance.screen.blit(surface, (x, 10))
+        self.game_instance.profiler.enter("hud")
+        self.hud.draw(self)
+        self.game_instance.profiler.leave()
+
+    def update_store(self, store: EntityStore, kind: type, count: int):
+        """ Update the first count objects of an EntityStore, stored state is moved all at once
+
+        Kinds without 'update_each' are left to update_all, update is only called on the objects the store
+        does not manage (the boss among enemies).
+        """
+        if kind.update_each:
+            game_objects = store.objects[:count]
+        else:
+            game_objects = [store[i] for i in store.unmanaged(count)]
+        profiler = self.game_instance.profiler
+        profiler.enter("update " + kind.__name__)
+        kind.update_all(store, self, count)
+        if profiler.enabled:
+            # objects of another type in the same store (the boss) get a phase of their own
+            for game_object in game_objects:
+                if type(game_object) is kind:
+                    game_object.update()
+                else:
+                    profiler.enter("update " + type(game_object).__name__)
+                    game_object.update()
+                    profiler.leave()
+        else:
+            for game_object in game_objects:
+                game_object.update()
+        profiler.leave()
+
+    def update_broadphase(self, *names: str):
+        self.game_instance.profiler.enter("collision")
+        for name in names:
+            game_objects = self.game_objects[name]
+            if isinstance(game_objects, EntityStore):
+                self.broadphase[name].rebuild(game_objects, *game_objects.bounds())
+            else:
+                self.broadphase[name].rebuild(game_objects)
+            for game_object in game_objects.dying:
+                self.broadphase[name].remove(game_object)
+        self.game_instance.profiler.leave()
+
+    def clear_level(self):
+        """ Hand pooled objects of the current level back before the level is thrown away"""
+        for name in self.pools:
+            self.game_objects[name].clear()
+
+    def prebuild(self):
+        """ Work on the level played next for a tick's share of time"""
+        if self.level_builder is not None and not self.level_builder.is_done:
+            self.game_instance.profiler.enter("prebuild level")
+            self.level_builder.advance(self.prebuild_budget)
+            self.game_instance.profiler.leave()
+
+    def start_prebuild(self):
+        """ Start building the level after the current one, if there is one"""
+        self.level_builder = None
+        if self.current_level < len(levels):
+            self.level_builder = LevelBuilder(levels[self.current_level], self, self.images)
+
+    def take_next_level(self) -> dict:
+        """ Game objects of the next level, only what the ticks so far did not get to is built now"""
+        builder, self.level_builder = self.level_builder, None
+        return builder.finish()
 
     def next_level(self):
+        if self.current_level < 5:
+            self.clear_level()
         if self.current_level == 1:
             self.score += 10000
-            self.game_objects = Level2().load(self.game_instance, self.images)
+            self.game_objects = self.take_next_level()
         elif self.current_level == 2:
             self.score += 20000
-            self.game_objects = Level3().load(self.game_instance, self.images)
+            self.game_objects = self.take_next_level()
         elif self.current_level == 3:
             self.score += 30000
-            self.game_objects = Level4().load(self.game_instance, self.images)
+            self.game_objects = self.take_next_level()
         elif self.current_level == 4:
             self.score += 40000
-            self.game_objects = Level5().load(self.game_instance, self.images)
+            self.game_objects = self.take_next_level()
         elif self.current_level == 5:
             self.score += 100000
-            self.game_instance.endScore = self.score
+            self.game_instance.end_score = self.score
+            self.game_instance.end_cause = None
             self.game_instance.load_scene("winscreen")
             return
 
         self.current_level += 1
+        # the old level is garbage now, it is collected once this frame is done
+        gc_policy.safe_point()
+        self.start_prebuild()
 
     def check_for_end(self):
         if len(self.game_objects["enemies"]) == 0:
@@ -316,10 +439,10 @@ class EndScreenScene(Scene):
         self.font = None
 
     def load(self):
-        self.font = pygame.font.SysFont("monospace", 16)
+        self.font = get_font("monospace", 16)
         self.labelTip1 = self.font.render("Nacisnij 'q' aby powrocic do menu glownego", 1, (255, 255, 255))
         self.labelTip2 = self.font.render("Nacisnij 'r' aby zagrac ponownie", 1, (255, 255, 255))
-        self.font = pygame.font.SysFont("monospace", 34)
+        self.font = get_font("monospace", 34)
         self.label = self.font.render("Koniec gry, Twoj wynik to: ", 1, (255, 255, 255))
 
     def unload(self):
@@ -327,17 +450,20 @@ class EndScreenScene(Scene):
         self.label = None
         self.labelTip1 = None
         self.labelTip2 = None
-        gc.collect()
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_q:
                 self.game_instance.load_scene("menu")
             if event.key == pygame.K_r:
-                self.game_instance.load_scene("gameplay")
+                self.game_instance.restart()
 
-    def tick(self):
-        number_label = self.font.render(str(self.game_instance.end_score), 1, (255, 255, 255))
+    def update(self):
+        # the first level of the next game
+        self.game_instance.scenes["gameplay"].prebuild()
+
+    def draw(self, alpha: float = 1):
+        number_label = text_cache.render(self.font, str(self.game_instance.end_score), (255, 255, 255))
 
         x = (self.game_instance.width - (self.label.get_rect().width + number_label.get_rect().width)) / 2
         y = (self.game_instance.height - self.label.get_rect().height) / 2
@@ -363,10 +489,10 @@ class WinScreenScene(Scene):
         self.font = None
 
     def load(self):
-        self.font = pygame.font.SysFont("monospace", 16)
+        self.font = get_font("monospace", 16)
         self.label_tip1 = self.font.render("Nacisnij 'q' aby powrocic do menu glownego", 1, (255, 255, 255))
         self.label_tip2 = self.font.render("Nacisnij 'r' aby zagrac ponownie", 1, (255, 255, 255))
-        self.font = pygame.font.SysFont("monospace", 34)
+        self.font = get_font("monospace", 34)
         self.label = self.font.render("Wygrales, twoj wynik to: ", 1, (255, 255, 255))
 
     def unload(self):
@@ -374,17 +500,20 @@ class WinScreenScene(Scene):
         self.label = None
         self.label_tip1 = None
         self.label_tip2 = None
-        gc.collect()
 
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_q:
                 self.game_instance.load_scene("menu")
             if event.key == pygame.K_r:
-                self.game_instance.load_scene("gameplay")
+                self.game_instance.restart()
+
+    def update(self):
+        # the first level of the next game
+        self.game_instance.scenes["gameplay"].prebuild()
 
-    def tick(self):
-        number_label = self.font.render(str(self.game_instance.end_score), 1, (255, 255, 255))
+    def draw(self, alpha: float = 1):
+        number_label = text_cache.render(self.font, str(self.game_instance.end_score), (255, 255, 255))
 
         x = (self.game_instance.width - (self.label.get_rect().width + number_label.get_rect().width)) / 2
         y = (self.game_instance.height - self.label.get_rect().height) / 2
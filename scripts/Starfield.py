@@ -0,0 +1,92 @@
+import numpy as np
+import pygame
+
+
+class Starfield:
+    """ Falling one pixel stars kept in NumPy arrays, moved by one array operation and drawn straight into pixels
+
+    At density 1 a star falls in every spawn_speed + 1 ticks and 75 are spread over the screen at the start,
+    the average count on screen at that rate. Higher densities spawn density stars at a time.
+    """
+    def __init__(self, game_instance, density: int = 1, spawn_speed: int = 4, capacity: int = 256):
+        self.game_instance = game_instance
+        self.width = game_instance.width
+        self.height = game_instance.height
+        self.density = density
+        self.spawn_speed = spawn_speed
+        self.spawn_cooldown = 0
+        self.rng = np.random.default_rng(game_instance.random.getrandbits(32))
+        self.color = (255, 255, 255)
+        # dirty rect tracking gets one rect per star up to this many, one rect for the whole field above it
+        self.max_star_rects = 256
+
+        self.count = 0
+        self.x = np.zeros(capacity, np.int64)
+        self.y = np.zeros(capacity, np.float64)
+        # px per tick
+        self.speed = np.zeros(capacity, np.float64)
+
+        n = 75 * density
+        self.spawn(n, self.rng.integers(0, self.height + 1, n))
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, n: int, y):
+        while self.count + n > len(self.x):
+            for name in ("x", "y", "speed"):
+                column = getattr(self, name)
+                grown = np.zeros(len(column) * 2, column.dtype)
+                grown[:self.count] = column[:self.count]
+                setattr(self, name, grown)
+
+        new = slice(self.count, self.count + n)
+        self.x[new] = self.rng.integers(0, self.width + 1, n)
+        self.y[new] = y
+        self.speed[new] = self.rng.random(n) * 2 + 1
+        self.count += n
+
+    def update(self):
+        if self.spawn_cooldown == 0:
+            self.spawn(self.density, 0)
+            self.spawn_cooldown = self.spawn_speed
+        else:
+            self.spawn_cooldown -= 1
+
+        n = self.count
+        y = self.y[:n]
+        y += self.speed[:n]
+        # stars that fell off the bottom are dropped, the rest is moved to the front
+        alive = y <= self.height
+        if not alive.all():
+            count = int(np.count_nonzero(alive))
+            for column in (self.x, self.y, self.speed):
+                column[:count] = column[:n][alive]
+            self.count = count
+
+    def draw(self, alpha: float = 1):
+        n = self.count
+        x = self.x[:n]
+        # stars fall at a constant speed, where they were a tick ago is known without a snapshot
+        y = np.trunc(self.y[:n] - self.speed[:n] * (1 - alpha)).astype(np.int64)
+        visible = (x < self.width) & (y >= 0) & (y < self.height)
+        x, y = x[visible], y[visible]
+        if len(x) == 0:
+            return
+
+        screen = self.game_instance.screen
+        surface = getattr(screen, "surface", screen)
+        if surface.get_bytesize() == 3:
+            pixels = pygame.surfarray.pixels3d(surface)
+            pixels[x, y] = self.color
+        else:
+            pixels = pygame.surfarray.pixels2d(surface)
+            pixels[x, y] = surface.map_rgb(self.color)
+        # the surface stays locked while the pixel array exists
+        del pixels
+
+        if hasattr(screen, "mark"):
+            if len(x) <= self.max_star_rects:
+                screen.mark([pygame.Rect(star_x, star_y, 1, 1) for star_x, star_y in zip(x.tolist(), y.tolist())])
+            else:
+                screen.mark([pygame.Rect(0, 0, self.width, self.height)])
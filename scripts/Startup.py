@@ -0,0 +1,43 @@
+import os
+import time
+
+
+def process_age() -> float:
+    """ Seconds since this process started, None where the system does not tell (anywhere but Linux)"""
+    try:
+        with open("/proc/self/stat") as file:
+            # the command name may contain spaces, fields are counted after its closing parenthesis
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """ Time from process start to the first menu frame, split into the phases marked along the way"""
+    def __init__(self, start: float):
+        # perf_counter() taken as the first thing main.py did
+        self.start = start
+        self.last = start
+        self.phases = []
+        # interpreter start up to main.py, the process start time is only known to 10 ms or so
+        age = process_age()
+        self.before_start = None if age is None else max(0.0, age - (time.perf_counter() - start))
+
+    def mark(self, name: str):
+        """ End the phase going on since the last mark"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        phases = list(self.phases)
+        if self.before_start is not None:
+            phases.insert(0, ("python start", self.before_start))
+        total = sum(seconds for name, seconds in phases)
+        print("startup to first menu frame:")
+        for name, seconds in phases:
+            print("  {:<20} {:8.1f} ms {:5.1f}%".format(name, seconds * 1000, seconds / total * 100 if total else 0))
+        print("  {:<20} {:8.1f} ms".format("total", total * 1000))
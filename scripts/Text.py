@@ -0,0 +1,56 @@
+import pygame
+
+from collections import OrderedDict
+
+
+class TextCache:
+    """ Rendered text keyed by font, text and colours, least recently used surfaces are dropped past max_entries
+
+    Changed text simply maps to a new key, so nothing has to be invalidated by hand. Cached surfaces are shared,
+    copy one before drawing on it or changing anything about it, a colorkey is asked for when rendering instead.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, color, background=None, colorkey=None) -> pygame.Surface:
+        """ Text drawn like font.render does, with colorkey set on the surface once when it is made"""
+        key = (font, text, tuple(color), tuple(background) if background is not None else None,
+               tuple(colorkey) if colorkey is not None else None)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, 1, color, background)
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def glyphs(self, font: pygame.font.Font, text: str, color) -> list:
+        """ One cached surface per character, a changing number only ever needs the ten digits"""
+        return [self.render(font, char, color) for char in text]
+
+    def stats(self) -> dict:
+        return dict(entries=len(self.surfaces), max_entries=self.max_entries, hits=self.hits, misses=self.misses)
+
+
+text_cache = TextCache()
+
+
+def blit_glyphs(screen: pygame.Surface, glyphs: list, pos: (int, int)) -> pygame.Rect:
+    """ Draw glyphs next to each other and return the area they took"""
+    x, y = pos
+    height = 0
+    for glyph in glyphs:
+        screen.blit(glyph, (x, y))
+        x += glyph.get_width()
+        height = max(height, glyph.get_height())
+    return pygame.Rect(pos, (x - pos[0], height))